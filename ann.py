@@ -0,0 +1,117 @@
+from typing import Optional
+from scipy import sparse
+import numpy as np
+
+class IVFIndex:
+    """Approximate nearest neighbour search over L2-normalised sparse rows, in NumPy only.
+
+    Rows are first reduced to `dim` dense dimensions with a sparse random
+    projection (every term is hashed to a few dimensions with random signs),
+    then grouped into `n_lists` clusters by spherical k-means. A query is
+    compared with the cluster centroids and only the rows in its `n_probe`
+    closest clusters become candidates, which the caller re-scores exactly.
+
+    Recall and latency are traded with `n_probe`: probing more lists finds
+    more of the true neighbours and scans more rows.
+    """
+
+    def __init__(self, projection: sparse.csr_matrix, centroids: np.ndarray,
+                 list_offsets: np.ndarray, list_ids: np.ndarray, n_probe: int):
+        self.projection = projection
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_ids = list_ids
+        self.n_probe = n_probe
+        for array in (projection.data, projection.indices, projection.indptr,
+                      centroids, list_offsets, list_ids):
+            array.flags.writeable = False
+
+    def __setstate__(self, state):
+        # Arrays come back writable from pickle; run __init__ to mark them read-only again
+        self.__init__(**state)
+
+    @property
+    def params(self) -> dict:
+        return {
+            "n_lists": len(self.centroids),
+            "dim": self.projection.shape[1],
+            "n_probe": self.n_probe
+        }
+
+    @classmethod
+    def build(cls, matrix: sparse.csr_matrix, n_lists: Optional[int] = None, dim: int = 256,
+              n_probe: int = 8, iterations: int = 10, sample_size: int = 100000,
+              seed: int = 0) -> 'IVFIndex':
+        """Cluster the rows of `matrix`; `n_lists` defaults to the square root of the row count"""
+        rng = np.random.default_rng(seed)
+        n_rows, n_terms = matrix.shape
+        n_lists = max(1, min(n_lists or int(np.sqrt(n_rows)), n_rows))
+
+        projection = cls._random_projection(n_terms, dim, rng)
+
+        # Train centroids on a sample, then assign every row
+        sample_ids = np.sort(rng.choice(n_rows, size=min(sample_size, n_rows), replace=False))
+        sample = cls._project(matrix[sample_ids], projection)
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = (sample @ centroids.T).argmax(axis=1)
+            members = sparse.csr_matrix(
+                (np.ones(len(sample), dtype=np.float32), (assignment, np.arange(len(sample)))),
+                shape=(n_lists, len(sample))
+            )
+            sums = np.asarray(members @ sample)
+            counts = np.bincount(assignment, minlength=n_lists)
+            # Clusters that lost all their points restart from a random sample row
+            empty = counts == 0
+            sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+            centroids = cls._normalize(sums)
+
+        assignment = cls._assign(matrix, projection, centroids)
+        list_ids = np.argsort(assignment, kind='stable').astype(np.int64)
+        list_offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignment, minlength=n_lists), out=list_offsets[1:])
+        return cls(projection, centroids, list_offsets, list_ids, min(n_probe, n_lists))
+
+    @staticmethod
+    def _random_projection(n_terms: int, dim: int, rng: np.random.Generator,
+                           per_term: int = 4) -> sparse.csr_matrix:
+        columns = rng.integers(0, dim, size=(n_terms, per_term))
+        signs = rng.choice([-1.0, 1.0], size=(n_terms, per_term)) / np.sqrt(per_term)
+        rows = np.repeat(np.arange(n_terms), per_term)
+        return sparse.csr_matrix(
+            (signs.ravel().astype(np.float32), (rows, columns.ravel())),
+            shape=(n_terms, dim)
+        )
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    @classmethod
+    def _project(cls, rows: sparse.csr_matrix, projection: sparse.csr_matrix) -> np.ndarray:
+        return cls._normalize(np.asarray((rows @ projection).todense(), dtype=np.float32))
+
+    @classmethod
+    def _assign(cls, matrix: sparse.csr_matrix, projection: sparse.csr_matrix,
+                centroids: np.ndarray, chunk_size: int = 8192) -> np.ndarray:
+        # Chunked so neither the reduced rows nor the distance block are held for millions of rows
+        assignment = np.empty(matrix.shape[0], dtype=np.int64)
+        for start in range(0, matrix.shape[0], chunk_size):
+            reduced = cls._project(matrix[start:start + chunk_size], projection)
+            assignment[start:start + chunk_size] = (reduced @ centroids.T).argmax(axis=1)
+        return assignment
+
+    def candidates(self, query: sparse.csr_matrix, n_probe: Optional[int] = None) -> np.ndarray:
+        """Row IDs in the lists closest to `query`, sorted ascending"""
+        n_probe = min(n_probe or self.n_probe, len(self.centroids))
+        reduced = self._project(query, self.projection)[0]
+        closeness = self.centroids @ reduced
+        probed = np.argpartition(-closeness, n_probe - 1)[:n_probe]
+        ids = np.concatenate([
+            self.list_ids[self.list_offsets[list_id]:self.list_offsets[list_id + 1]]
+            for list_id in probed
+        ])
+        ids.sort()
+        return ids
@@ -0,0 +1,93 @@
+"""Prebuilt startup artifacts, so a node can start without network access.
+
+Build the artifacts once, where downloads work:
+    python -m app.artifacts /path/to/artifacts
+
+then start the service with ARTIFACT_DIR=/path/to/artifacts. Nothing is
+downloaded at startup in that mode, and a missing artifact stops startup
+right away instead of hanging on a download. Layout:
+    spacy/       the spaCy pipeline, saved with nlp.to_disk
+    skills.pkl   the compiled skill gazetteer
+    index/       the fitted catalog indexes
+"""
+from typing import Dict, Iterator, Optional
+from contextlib import contextmanager
+import argparse
+import time
+import os
+
+SPACY_DIR = "spacy"
+SKILLS_FILE = "skills.pkl"
+INDEX_DIR = "index"
+
+class MissingArtifact(FileNotFoundError):
+    """Raised when a required startup artifact doesn't exist"""
+
+def artifact_path(directory: str, name: str) -> str:
+    """Path of artifact `name` in `directory`; raises MissingArtifact if it doesn't exist"""
+    path = os.path.join(directory, name)
+    if not os.path.exists(path):
+        raise MissingArtifact(
+            f"Startup artifact {path} is missing; build it with `python -m app.artifacts {directory}`"
+        )
+    return path
+
+def check_artifacts(directory: str):
+    """Fail before loading anything if any artifact is missing"""
+    for name in (SPACY_DIR, SKILLS_FILE, INDEX_DIR):
+        artifact_path(directory, name)
+
+class StartupTimer:
+    """Wall-clock time of each startup phase, in the order they ran"""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - started
+
+    def summary(self) -> str:
+        parts = [f"{name} {seconds:.2f}s" for name, seconds in self.phases.items()]
+        return ", ".join(parts + [f"total {sum(self.phases.values()):.2f}s"])
+
+def build_artifacts(directory: str, model: str, taxonomy_path: str, catalog_path: str,
+                    ann_config: Optional[dict] = None, ann_min_entries: int = 200000):
+    """Download and compile everything ARTIFACT_DIR startup needs into `directory`"""
+    # Imported here: building needs the heavy libraries, reading this module doesn't
+    from app.skills import SkillGazetteer
+    from app.catalog import CatalogSnapshot, load_catalog
+    import spacy
+
+    os.makedirs(directory, exist_ok=True)
+    try:
+        nlp = spacy.load(model)
+    except OSError:
+        spacy.cli.download(model)
+        nlp = spacy.load(model)
+    nlp.to_disk(os.path.join(directory, SPACY_DIR))
+
+    SkillGazetteer.load(taxonomy_path, os.path.join(directory, SKILLS_FILE))
+    CatalogSnapshot(
+        load_catalog(catalog_path), os.path.join(directory, INDEX_DIR), ann_config, ann_min_entries
+    )
+
+if __name__ == "__main__":
+    from app import config
+
+    parser = argparse.ArgumentParser(description="Build the artifacts for offline startup (ARTIFACT_DIR)")
+    parser.add_argument("directory")
+    parser.add_argument("--model", default=config.SPACY_MODEL, help="spaCy pipeline to package")
+    args = parser.parse_args()
+
+    timer = StartupTimer()
+    with timer.phase("build"):
+        build_artifacts(
+            args.directory, args.model, config.SKILL_TAXONOMY, config.CATALOG_PATH,
+            config.ANN_CONFIG, config.ANN_MIN_ENTRIES
+        )
+    print(f"Artifacts written to {args.directory} in {timer.phases['build']:.1f}s")
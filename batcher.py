@@ -0,0 +1,97 @@
+from typing import Any, Awaitable, Callable, Dict, List, Tuple, Type
+import asyncio
+
+class MicroBatcher:
+    """Groups items submitted close together in time into one batch call.
+
+    The first item of a batch opens a window of `window` seconds; everything
+    submitted before it closes, up to `max_batch_size` items, is handed to
+    `process_batch` in one call, and each caller gets the result at its own
+    position. A full batch is sent right away without waiting for the window.
+    A window of 0 still groups items submitted in the same event loop tick.
+
+    If a batch fails, its items are retried one at a time so that a single
+    bad item only fails its own caller. Exceptions listed in `no_retry`, such
+    as overload errors, fail the whole batch at once instead.
+    """
+
+    def __init__(self, process_batch: Callable[[List[Any]], Awaitable[List[Any]]],
+                 max_batch_size: int = 32, window: float = 0.005,
+                 no_retry: Tuple[Type[BaseException], ...] = ()):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.window = window
+        self.no_retry = no_retry
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer = None
+        # The event loop only keeps weak references to tasks
+        self._running = set()
+        self.counters = {
+            "batches": 0,
+            "items": 0,
+            "retried_batches": 0
+        }
+
+    async def submit(self, item: Any) -> Any:
+        """Add `item` to the current batch and wait for its result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        # Callers that went away don't need their items processed
+        batch = [(item, future) for item, future in batch if not future.done()]
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]]):
+        self.counters["batches"] += 1
+        self.counters["items"] += len(batch)
+        try:
+            results = await self.process_batch([item for item, _ in batch])
+        except Exception as e:
+            if len(batch) == 1 or isinstance(e, self.no_retry):
+                for _, future in batch:
+                    self._resolve(future, exception=e)
+                return
+            self.counters["retried_batches"] += 1
+            await asyncio.gather(*(self._run_one(item, future) for item, future in batch))
+            return
+        for (_, future), result in zip(batch, results):
+            self._resolve(future, result=result)
+
+    async def _run_one(self, item: Any, future: asyncio.Future):
+        try:
+            result = (await self.process_batch([item]))[0]
+        except Exception as e:
+            self._resolve(future, exception=e)
+        else:
+            self._resolve(future, result=result)
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, result: Any = None, exception: BaseException = None):
+        if future.done():
+            return
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        batches = self.counters["batches"]
+        return {
+            **self.counters,
+            "pending": len(self._pending),
+            "mean_batch_size": self.counters["items"] / batches if batches else 0.0
+        }
@@ -0,0 +1,61 @@
+"""Recall and latency of the IVF ANN index against exact cosine similarity.
+
+Usage:
+    python -m app.benchmarks.bench_ann [entries] [queries]
+
+The synthetic catalog is drawn from a few hundred role "topics", each a
+Zipf-weighted mix of skills, so it clusters the way real postings do. Recall@10
+is measured against sklearn's cosine_similarity over the full matrix.
+"""
+from app.catalog_index import CatalogIndex
+from sklearn.metrics.pairwise import cosine_similarity
+import numpy as np
+import time
+import sys
+
+def synthetic_catalog(entries: int, topics: int = 300, vocabulary_size: int = 20000, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array([f"skill{i}" for i in range(vocabulary_size)])
+    topic_skills = [rng.choice(vocabulary_size, size=60, replace=False) for _ in range(topics)]
+    weights = 1 / np.arange(1, 61) ** 0.7
+    weights /= weights.sum()
+
+    def draw(topic: int, size: int) -> str:
+        return ' '.join(vocabulary[rng.choice(topic_skills[topic], size=size, p=weights)])
+
+    texts = [draw(rng.integers(topics), rng.integers(4, 15)) for _ in range(entries)]
+    return texts, draw, topics, rng
+
+def run(entries: int, queries: int, k: int = 10):
+    texts, draw, topics, rng = synthetic_catalog(entries)
+    started = time.perf_counter()
+    index = CatalogIndex.build(texts, ann_config={"n_probe": 1})
+    print(f"{entries} entries, {index.ann.params['n_lists']} lists, built in {time.perf_counter() - started:.1f} s")
+
+    query_vectors = [index.transform(draw(rng.integers(topics), rng.integers(5, 20))) for _ in range(queries)]
+    exact_times, truth = [], []
+    for query in query_vectors:
+        started = time.perf_counter()
+        similarities = cosine_similarity(query, index.matrix)[0]
+        exact = np.argpartition(-similarities, k)[:k]
+        exact_times.append(time.perf_counter() - started)
+        truth.append(set(exact[similarities[exact] > 0]))
+    print(f"  exact        p50 {np.percentile(exact_times, 50) * 1000:7.2f} ms")
+
+    for n_probe in (1, 2, 4, 8, 16, 32):
+        index.ann.n_probe = n_probe
+        times, hits, relevant = [], 0, 0
+        for query, expected in zip(query_vectors, truth):
+            started = time.perf_counter()
+            ids, _ = index.top_k(query, k)
+            times.append(time.perf_counter() - started)
+            hits += len(expected & set(ids))
+            relevant += len(expected)
+        print(f"  n_probe={n_probe:<3d} p50 {np.percentile(times, 50) * 1000:7.2f} ms"
+              f"  p99 {np.percentile(times, 99) * 1000:7.2f} ms  recall@{k} {hits / max(relevant, 1):.3f}")
+
+if __name__ == "__main__":
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 250000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    )
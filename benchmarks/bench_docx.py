@@ -0,0 +1,63 @@
+"""Compare the streaming DOCX reader with the python-docx object model.
+
+Usage:
+    python -m app.benchmarks.bench_docx [resume.docx ...]
+
+Without arguments a synthetic resume is generated with python-docx: body
+paragraphs, a skills table, a header and an embedded image.
+"""
+from app.parser import ResumeParser
+from docx import Document
+from typing import List
+import struct
+import timeit
+import zlib
+import sys
+import io
+
+def _png(width: int, height: int) -> bytes:
+    """A valid, poorly compressible RGB PNG so the image dominates the archive"""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+    rows = b''.join(b'\x00' + bytes((x * 7 + y * 13) % 256 for x in range(width * 3)) for y in range(height))
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'IDAT', zlib.compress(rows)) + chunk(b'IEND', b'')
+
+def synthetic_resume(paragraphs: int = 400) -> bytes:
+    document = Document()
+    document.sections[0].header.paragraphs[0].text = "Jane Doe - jane@example.com"
+    document.add_picture(io.BytesIO(_png(600, 600)))
+    for i in range(paragraphs):
+        document.add_paragraph(f"Led project {i} building data pipelines with Python, SQL and Docker on AWS.")
+    table = document.add_table(rows=20, cols=2)
+    for row in table.rows:
+        row.cells[0].text = "Skills"
+        row.cells[1].text = "Machine Learning, Kubernetes, Statistics"
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+def python_docx_text(content: bytes) -> str:
+    """The extraction used before the streaming reader"""
+    document = Document(io.BytesIO(content))
+    return "\n".join([paragraph.text for paragraph in document.paragraphs])
+
+def run(samples: List[bytes], repeat: int = 20):
+    parser = ResumeParser()
+    for number, content in enumerate(samples, 1):
+        streaming = min(timeit.repeat(lambda: parser._parse_doc(io.BytesIO(content)), number=1, repeat=repeat))
+        object_model = min(timeit.repeat(lambda: python_docx_text(content), number=1, repeat=repeat))
+        print(f"sample {number}: {len(content) / 1024:.0f} KiB")
+        print(f"  python-docx : {object_model * 1000:8.2f} ms, {len(python_docx_text(content))} chars")
+        print(f"  streaming   : {streaming * 1000:8.2f} ms, {len(parser._parse_doc(io.BytesIO(content)))} chars")
+        print(f"  speedup     : {object_model / streaming:8.1f}x")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        samples = []
+        for path in sys.argv[1:]:
+            with open(path, 'rb') as f:
+                samples.append(f.read())
+    else:
+        samples = [synthetic_resume()]
+    run(samples)
@@ -0,0 +1,102 @@
+"""Compare the full and the parser-free fast analysis modes.
+
+Usage:
+    python -m app.benchmarks.bench_nlp_modes [resume.pdf|.docx|.txt ...]
+
+Without arguments synthetic resumes are generated. The model is SPACY_MODEL.
+Throughput is measured with analyze_many for each mode. Quality is measured
+against full mode as the reference: the share of its skills and key phrases
+that fast mode also finds, the share of fast mode's skills that full mode
+finds too, and how often the two summaries are identical.
+"""
+from app.nlp_processor import NLPProcessor, MODES
+from app.parser import ResumeParser
+from app import config
+from typing import Dict, List
+from pathlib import Path
+import random
+import timeit
+import sys
+
+_SENTENCES = [
+    "Built data pipelines with {a} and {b} at {company} from {year} to {end}.",
+    "Led a team of {n} engineers migrating services to {a}.",
+    "Designed REST APIs in {a} and deployed them on {b}.",
+    "Reduced report generation time by {n}0% using {a}.",
+    "Worked as a {role} at {company} in {city}.",
+    "Mentored junior developers and reviewed code written in {a} and {b}.",
+    "Skills: {a}, {b}, SQL, Git."
+]
+_SKILLS = ["Python", "Java", "Docker", "Kubernetes", "AWS", "PostgreSQL", "React", "Spark",
+           "TensorFlow", "Terraform", "Go", "Kafka", "Airflow", "Django"]
+_COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Analytics", "Stark Industries"]
+_ROLES = ["software engineer", "data engineer", "backend developer", "machine learning engineer"]
+_CITIES = ["Berlin", "Toronto", "Austin", "Singapore"]
+
+def synthetic_resumes(count: int = 200, sentences: int = 12, seed: int = 0) -> List[dict]:
+    rng = random.Random(seed)
+    resumes = []
+    for _ in range(count):
+        lines = []
+        for _ in range(sentences):
+            year = rng.randint(2005, 2020)
+            lines.append(rng.choice(_SENTENCES).format(
+                a=rng.choice(_SKILLS), b=rng.choice(_SKILLS), company=rng.choice(_COMPANIES),
+                role=rng.choice(_ROLES), city=rng.choice(_CITIES), n=rng.randint(2, 9),
+                year=year, end=year + rng.randint(1, 4)
+            ))
+        resumes.append({'raw_text': " ".join(lines)})
+    return resumes
+
+def _share(found: List[str], reference: List[str]) -> float:
+    """Share of `reference` items that are in `found`; 1.0 when there are none to find"""
+    if not reference:
+        return 1.0
+    found = set(found)
+    return sum(item in found for item in reference) / len(reference)
+
+def _phrase_share(found: List[str], reference: List[str]) -> float:
+    """Share of `reference` phrases contained in one of the `found` phrases"""
+    if not reference:
+        return 1.0
+    return sum(any(phrase in other for other in found) for phrase in reference) / len(reference)
+
+def quality(full: List[Dict], fast: List[Dict]) -> Dict[str, float]:
+    n = len(full)
+    return {
+        "skill recall": sum(_share(b['skills'], a['skills']) for a, b in zip(full, fast)) / n,
+        "skill precision": sum(_share(a['skills'], b['skills']) for a, b in zip(full, fast)) / n,
+        "key phrase recall": sum(
+            _phrase_share(b['key_phrases'], a['key_phrases']) for a, b in zip(full, fast)
+        ) / n,
+        "same summary": sum(a['summary'] == b['summary'] for a, b in zip(full, fast)) / n,
+        "same entities": sum(a['entities'] == b['entities'] for a, b in zip(full, fast)) / n
+    }
+
+def run(documents: List[dict], repeat: int = 3):
+    processor = NLPProcessor(model=config.SPACY_MODEL)
+    print(f"{len(documents)} documents, model {config.SPACY_MODEL}")
+
+    results = {}
+    for mode in MODES:
+        seconds = min(timeit.repeat(
+            lambda: list(processor.analyze_many(documents, mode=mode)), number=1, repeat=repeat
+        ))
+        results[mode] = list(processor.analyze_many(documents, mode=mode))
+        disabled = processor.disabled_components(processor.select_fields(), mode)
+        print(f"  {mode:5} : {len(documents) / seconds:8.1f} docs/s  (disabled: {', '.join(disabled)})")
+
+    print("fast mode against full mode:")
+    for name, value in quality(results['full'], results['fast']).items():
+        print(f"  {name:17} : {value:6.1%}")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        parser = ResumeParser()
+        documents = []
+        for path in sys.argv[1:]:
+            with open(path, 'rb') as f:
+                documents.append(parser.parse(f.read(), Path(path).suffix.lower()))
+    else:
+        documents = synthetic_resumes()
+    run(documents)
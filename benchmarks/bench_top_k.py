@@ -0,0 +1,63 @@
+"""Latency of CatalogIndex.top_k against scoring and sorting the whole catalog.
+
+Usage:
+    python -m app.benchmarks.bench_top_k [entries] [queries]
+
+Builds a synthetic catalog whose skill frequencies follow a Zipf-like curve, as
+real job postings do, and checks that both paths return the same top 3.
+"""
+from app.catalog_index import Boost, CatalogIndex
+import numpy as np
+import time
+import sys
+
+def synthetic_catalog(entries: int, vocabulary_size: int = 20000, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array([f"skill{i}" for i in range(vocabulary_size)])
+    frequencies = 1 / np.arange(1, vocabulary_size + 1) ** 0.8
+    frequencies /= frequencies.sum()
+    texts = [
+        ' '.join(rng.choice(vocabulary, size=rng.integers(3, 15), p=frequencies))
+        for _ in range(entries)
+    ]
+    return texts, vocabulary, frequencies, rng
+
+def full_scan(index: CatalogIndex, query, boost: Boost, k: int) -> np.ndarray:
+    similarities = index.similarities(query)
+    boosts = np.zeros(len(similarities))
+    boosts[boost.ids] = boost.amount
+    scores = np.where(similarities > 0, np.minimum(similarities + boosts, 1.0), -1.0)
+    ranked = np.lexsort((np.arange(len(scores)), -scores))[:k]
+    return ranked[similarities[ranked] > 0]
+
+def run(entries: int, queries: int, k: int = 3):
+    texts, vocabulary, frequencies, rng = synthetic_catalog(entries)
+    started = time.perf_counter()
+    index = CatalogIndex.build(texts)
+    print(f"{entries} entries, index built in {time.perf_counter() - started:.1f} s")
+    boost = Boost(np.nonzero(rng.random(entries) < 0.3)[0], 0.2)
+
+    top_k_times, scan_times, mismatches = [], [], 0
+    for _ in range(queries):
+        skills = rng.choice(vocabulary, size=rng.integers(5, 40), p=frequencies)
+        query = index.query_vector({skill: float(rng.uniform(1.0, 1.3)) for skill in skills})
+
+        started = time.perf_counter()
+        ids, _ = index.top_k(query, k, boost)
+        top_k_times.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        expected = full_scan(index, query, boost, k)
+        scan_times.append(time.perf_counter() - started)
+        mismatches += list(ids) != list(expected)
+
+    for name, times in (("top_k", top_k_times), ("full scan", scan_times)):
+        print(f"  {name:10s} p50 {np.percentile(times, 50) * 1000:7.2f} ms"
+              f"  p99 {np.percentile(times, 99) * 1000:7.2f} ms")
+    print(f"  mismatching results: {mismatches}/{queries}")
+
+if __name__ == "__main__":
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 250000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    )
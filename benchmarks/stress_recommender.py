@@ -0,0 +1,89 @@
+"""Stress check for concurrent use of Recommender.
+
+Usage:
+    python -m app.benchmarks.stress_recommender [threads] [requests_per_thread]
+
+Builds a synthetic catalog, records the expected recommendations for a set of
+resumes on one thread, then replays those resumes from many threads at once
+while another thread keeps reloading the catalog. Every concurrent result must
+equal the sequential one; the exit status is 1 if any differs.
+"""
+from app.recommender import Recommender
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import threading
+import tempfile
+import json
+import sys
+import os
+
+def synthetic_catalog_file(directory: str, jobs: int = 5000, courses: int = 1000, seed: int = 0) -> str:
+    rng = np.random.default_rng(seed)
+    skills = [f"Skill {i}" for i in range(500)]
+    catalog = {
+        "skill_weights": {skill: float(rng.uniform(1.0, 1.3)) for skill in skills[:100]},
+        "industry_clusters": {
+            f"industry_{i}": list(rng.choice(skills, size=8, replace=False)) for i in range(20)
+        },
+        "job_roles": [
+            {"title": f"Job {i}", "required_skills": list(rng.choice(skills, size=6, replace=False)),
+             "description": ""}
+            for i in range(jobs)
+        ],
+        "courses": [
+            {"title": f"Course {i}", "skills": list(rng.choice(skills, size=4, replace=False)),
+             "level": str(rng.choice(["Beginner", "Intermediate", "Advanced"]))}
+            for i in range(courses)
+        ]
+    }
+    path = os.path.join(directory, "catalog.json")
+    with open(path, "w") as f:
+        json.dump(catalog, f)
+    return path
+
+def run(threads: int, requests_per_thread: int) -> bool:
+    with tempfile.TemporaryDirectory() as directory:
+        recommender = Recommender(catalog_path=synthetic_catalog_file(directory))
+        rng = np.random.default_rng(1)
+        resumes = [
+            {"skills": [f"Skill {i}" for i in rng.choice(500, size=rng.integers(3, 25), replace=False)]}
+            for _ in range(200)
+        ]
+        expected = [json.dumps(recommender.get_recommendations(resume), sort_keys=True) for resume in resumes]
+
+        stop = threading.Event()
+        reloads = 0
+
+        def keep_reloading():
+            nonlocal reloads
+            while not stop.is_set():
+                recommender.reload()
+                reloads += 1
+
+        def worker(offset: int) -> int:
+            mismatches = 0
+            for i in range(requests_per_thread):
+                index = (offset + i) % len(resumes)
+                result = json.dumps(recommender.get_recommendations(resumes[index]), sort_keys=True)
+                mismatches += result != expected[index]
+            return mismatches
+
+        reloader = threading.Thread(target=keep_reloading)
+        reloader.start()
+        try:
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                mismatches = sum(pool.map(worker, range(0, threads * 7, 7)))
+        finally:
+            stop.set()
+            reloader.join()
+
+    total = threads * requests_per_thread
+    print(f"{total} requests on {threads} threads, {reloads} concurrent reloads, {mismatches} mismatches")
+    return mismatches == 0
+
+if __name__ == "__main__":
+    ok = run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 32,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    )
+    sys.exit(0 if ok else 1)
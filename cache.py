@@ -0,0 +1,178 @@
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import threading
+import hashlib
+import pickle
+import time
+import os
+
+def content_hash(content: bytes) -> str:
+    """Key for uploaded file bytes"""
+    return hashlib.sha256(content).hexdigest()
+
+class ResultCache:
+    """Content-addressed cache with an in-memory LRU tier and an optional disk tier.
+
+    Values are stored pickled, so a hit always hands out a fresh copy that the
+    caller may modify, and the memory tier can be bounded by the real size of
+    what it holds. The disk tier is a plain directory of files written
+    atomically, so several worker processes can share it.
+
+    The disk tier is pruned in a background thread at most every
+    `disk_prune_interval` seconds: entries older than `disk_max_age` seconds
+    go first, then the least recently used ones until the tier fits in
+    `disk_max_bytes`. Disk hits refresh an entry's modification time, which
+    is what "recently used" means here.
+    """
+
+    def __init__(self, max_bytes: int, disk_dir: Optional[str] = None,
+                 disk_max_bytes: Optional[int] = None, disk_max_age: Optional[float] = None,
+                 disk_prune_interval: float = 60.0):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.disk_max_age = disk_max_age
+        self.disk_prune_interval = disk_prune_interval
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._pruning = False
+        self._next_prune = 0.0
+        self.counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "disk_evictions": 0
+        }
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for `key`, or None on a miss"""
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+                self.counters["memory_hits"] += 1
+        if payload is not None:
+            return pickle.loads(payload)
+
+        payload = self._read_disk(key)
+        if payload is None:
+            with self._lock:
+                self.counters["misses"] += 1
+            return None
+
+        with self._lock:
+            self.counters["disk_hits"] += 1
+            self._store(key, payload)
+        return pickle.loads(payload)
+
+    def set(self, key: str, value: Any):
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._store(key, payload)
+        self._write_disk(key, payload)
+
+    def _store(self, key: str, payload: bytes):
+        # Caller holds the lock
+        if len(payload) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._size -= len(previous)
+        self._entries[key] = payload
+        self._size += len(payload)
+        while self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+            self.counters["evictions"] += 1
+
+    def _disk_path(self, key: str) -> str:
+        name = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.disk_dir, name[:2], f"{name}.pkl")
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'rb') as f:
+                payload = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        return payload
+
+    def _write_disk(self, key: str, payload: bytes):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+        self._maybe_prune_disk()
+
+    def _maybe_prune_disk(self):
+        if self.disk_max_bytes is None and self.disk_max_age is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if self._pruning or now < self._next_prune:
+                return
+            self._pruning = True
+            self._next_prune = now + self.disk_prune_interval
+        # Walking the directory takes a while on a big tier; don't hold up the caller
+        threading.Thread(target=self.prune_disk, name="cache-prune", daemon=True).start()
+
+    def prune_disk(self):
+        """Delete expired disk entries, then the least recently used ones over the size limit"""
+        try:
+            entries = []
+            for directory, _, filenames in os.walk(self.disk_dir):
+                for filename in filenames:
+                    path = os.path.join(directory, filename)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+            entries.sort()
+
+            expired_before = time.time() - self.disk_max_age if self.disk_max_age is not None else None
+            total = sum(size for _, size, _ in entries)
+            evicted = 0
+            for modified, size, path in entries:
+                expired = expired_before is not None and modified < expired_before
+                if not expired and (self.disk_max_bytes is None or total <= self.disk_max_bytes):
+                    break
+                try:
+                    os.unlink(path)
+                    evicted += 1
+                except OSError:
+                    # Another worker got there first
+                    pass
+                total -= size
+            with self._lock:
+                self.counters["disk_evictions"] += evicted
+        finally:
+            with self._lock:
+                self._pruning = False
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.counters,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "disk": bool(self.disk_dir)
+            }
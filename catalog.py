@@ -0,0 +1,268 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from app.catalog_index import Boost, CatalogIndex
+from app.skills import SkillVocabulary
+from functools import lru_cache
+from scipy import sparse
+import numpy as np
+import threading
+import logging
+import hashlib
+import sqlite3
+import json
+import os
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'catalog.json')
+
+EXPERIENCE_LEVELS = {'beginner': 0, 'intermediate': 1, 'advanced': 2}
+
+def load_catalog(path: str) -> Dict[str, Any]:
+    """Read job roles, courses, skill weights and industry clusters from a catalog file.
+
+    `.json` files hold one object with the four sections. `.jsonl` files hold
+    one record per line, tagged by "type": "job", "course", "skill_weight"
+    (with "skill" and "weight") or "industry" (with "name" and "skills").
+    SQLite databases (`.db`, `.sqlite`, `.sqlite3`) have the tables `jobs`,
+    `courses`, `skill_weights` and `industry_clusters`, with skill lists stored
+    as JSON arrays.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.json':
+        with open(path, encoding='utf-8') as f:
+            catalog = json.load(f)
+    elif extension == '.jsonl':
+        catalog = _load_jsonl(path)
+    elif extension in {'.db', '.sqlite', '.sqlite3'}:
+        catalog = _load_sqlite(path)
+    else:
+        raise ValueError(f"Unsupported catalog format: {extension}")
+
+    return {
+        'job_roles': catalog.get('job_roles', []),
+        'courses': catalog.get('courses', []),
+        'skill_weights': catalog.get('skill_weights', {}),
+        'industry_clusters': catalog.get('industry_clusters', {})
+    }
+
+def _load_jsonl(path: str) -> Dict[str, Any]:
+    catalog = {'job_roles': [], 'courses': [], 'skill_weights': {}, 'industry_clusters': {}}
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            record_type = record.pop('type', None)
+            if record_type == 'job':
+                catalog['job_roles'].append(record)
+            elif record_type == 'course':
+                catalog['courses'].append(record)
+            elif record_type == 'skill_weight':
+                catalog['skill_weights'][record['skill']] = float(record['weight'])
+            elif record_type == 'industry':
+                catalog['industry_clusters'][record['name']] = record['skills']
+            else:
+                raise ValueError(f"{path}:{line_number}: unknown record type {record_type!r}")
+    return catalog
+
+def _load_sqlite(path: str) -> Dict[str, Any]:
+    # Read-only, so a writer updating the database can't be blocked or corrupted by us
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        return {
+            'job_roles': [
+                {'title': title, 'required_skills': json.loads(skills), 'description': description}
+                for title, skills, description in connection.execute(
+                    "SELECT title, required_skills, description FROM jobs ORDER BY rowid"
+                )
+            ],
+            'courses': [
+                {'title': title, 'skills': json.loads(skills), 'level': level}
+                for title, skills, level in connection.execute(
+                    "SELECT title, skills, level FROM courses ORDER BY rowid"
+                )
+            ],
+            'skill_weights': {
+                skill: float(weight)
+                for skill, weight in connection.execute("SELECT skill, weight FROM skill_weights")
+            },
+            'industry_clusters': {
+                name: json.loads(skills)
+                for name, skills in connection.execute(
+                    "SELECT name, skills FROM industry_clusters ORDER BY rowid"
+                )
+            }
+        }
+    finally:
+        connection.close()
+
+class CatalogSnapshot:
+    """One version of the catalog with every index built from it.
+
+    A snapshot is fully built before anyone can see it and never changes
+    afterwards, so a request that picked up a snapshot keeps a consistent view
+    even if a newer one is swapped in halfway through. Index arrays are marked
+    read-only and skill lists are tuples; treat the remaining dicts as
+    read-only too.
+    """
+
+    def __init__(self, catalog: Dict[str, Any], index_dir: Optional[str] = None,
+                 ann_config: Optional[dict] = None, ann_min_entries: int = 200000,
+                 rebuild_indexes: bool = True):
+        # Identifies the catalog contents in cache keys
+        self.version = hashlib.sha256(json.dumps([
+            catalog['job_roles'],
+            catalog['courses'],
+            catalog['skill_weights'],
+            catalog['industry_clusters']
+        ], sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+        # Skill lists become tuples: recommendations copy job and course records
+        # into responses, and a shared list there could be modified by a caller
+        self.job_roles: Tuple[Dict[str, Any], ...] = tuple(
+            {**job, 'required_skills': tuple(job['required_skills'])} for job in catalog['job_roles']
+        )
+        self.courses: Tuple[Dict[str, Any], ...] = tuple(
+            {**course, 'skills': tuple(course['skills'])} for course in catalog['courses']
+        )
+        self.skill_weights: Dict[str, float] = dict(catalog['skill_weights'])
+        self.industry_clusters: Dict[str, Tuple[str, ...]] = {
+            industry: tuple(skills) for industry, skills in catalog['industry_clusters'].items()
+        }
+
+        # Vectorize each catalog once; requests only transform their own text.
+        # Catalogs with at least `ann_min_entries` entries also get an ANN index.
+        # Without `rebuild_indexes` the indexes saved in `index_dir` must match.
+        self.job_index = self._load_index(
+            index_dir, 'jobs', [' '.join(job['required_skills']) for job in self.job_roles],
+            ann_config if len(self.job_roles) >= ann_min_entries else None, rebuild_indexes
+        )
+        self.course_index = self._load_index(
+            index_dir, 'courses', [' '.join(course['skills']) for course in self.courses],
+            ann_config if len(self.courses) >= ann_min_entries else None, rebuild_indexes
+        )
+
+        # Every skill named in the catalog gets an integer ID, and jobs, courses
+        # and industry clusters become rows of entity x skill matrices over them
+        self.skills = SkillVocabulary(
+            skill
+            for skill_lists in (
+                (job['required_skills'] for job in self.job_roles),
+                (course['skills'] for course in self.courses),
+                self.industry_clusters.values()
+            )
+            for skills in skill_lists
+            for skill in skills
+        )
+        # Courses keep their skill IDs in listed order, to report missing skills in that order
+        self.course_skill_ids: Tuple[Tuple[int, ...], ...] = tuple(
+            tuple(map(self.skills.get, course['skills'])) for course in self.courses
+        )
+        # 0/1 job x skill and cluster x skill matrices, and the listed size of each
+        # cluster, so the coverage of every cluster comes from one sparse product
+        self.job_skills = self._skill_matrix(
+            [set(map(self.skills.get, job['required_skills'])) for job in self.job_roles]
+        )
+        self.industry_names: Tuple[str, ...] = tuple(self.industry_clusters)
+        self.industry_ids: Dict[str, int] = {name: i for i, name in enumerate(self.industry_names)}
+        self.industry_skills = self._skill_matrix(
+            [set(map(self.skills.get, cluster_skills)) for cluster_skills in self.industry_clusters.values()]
+        )
+        self.industry_sizes = np.array([len(skills) for skills in self.industry_clusters.values()], dtype=np.float64)
+        # Job bonuses are computed per industry on first use; with thousands of
+        # clusters, precomputing every cluster x job combination would not fit.
+        # Each one holds only the IDs of the jobs that get it.
+        self.industry_job_bonus = lru_cache(maxsize=1024)(self._industry_job_bonus)
+
+        # Courses as a course x skill count matrix, so skill gaps of every course
+        # are computed with a few matrix-vector products
+        self.course_skills = self._skill_matrix(self.course_skill_ids)
+        # Market weight of each skill, and the total weight and count per course
+        self.skill_weight_vector = np.array([self.skill_weights.get(skill, 1.0) for skill in self.skills.names])
+        self.course_weight_totals = self.course_skills @ self.skill_weight_vector
+        self.course_skill_counts = np.asarray(self.course_skills.sum(axis=1)).ravel()
+        # Per experience level, the factor applied to each course's relevance
+        course_levels = np.array([
+            EXPERIENCE_LEVELS.get(course['level'].lower(), 1) for course in self.courses
+        ])
+        self.course_level_factors = np.array([
+            1 - 0.2 * np.abs(course_levels - level) for level in range(len(EXPERIENCE_LEVELS))
+        ])
+        for array in (self.course_skills.data, self.course_skills.indices, self.course_skills.indptr,
+                      self.job_skills.data, self.job_skills.indices, self.job_skills.indptr,
+                      self.industry_skills.data, self.industry_skills.indices, self.industry_skills.indptr,
+                      self.industry_sizes, self.skill_weight_vector, self.course_weight_totals,
+                      self.course_skill_counts, self.course_level_factors):
+            array.flags.writeable = False
+
+    def _skill_matrix(self, rows_of_ids: Sequence[Iterable[int]]) -> sparse.csr_matrix:
+        """Sparse matrix with one row per item, counting each skill ID listed for it"""
+        rows = [row for row, ids in enumerate(rows_of_ids) for _ in ids]
+        columns = [skill_id for ids in rows_of_ids for skill_id in ids]
+        matrix = sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, columns)),
+            shape=(len(rows_of_ids), len(self.skills))
+        )
+        matrix.sum_duplicates()
+        return matrix
+
+    def industry_coverage(self, skill_vector: np.ndarray) -> np.ndarray:
+        """Share of each industry cluster's listed skills present in a 0/1 skill vector"""
+        return self.industry_skills @ skill_vector / np.maximum(self.industry_sizes, 1.0)
+
+    def _industry_job_bonus(self, industry: Optional[str]) -> Optional[Boost]:
+        """The bonus for jobs sharing a skill with the industry cluster, or None if unknown"""
+        industry_id = self.industry_ids.get(industry)
+        if industry_id is None:
+            return None
+        shared = self.job_skills @ self.industry_skills[industry_id].T
+        job_ids = np.unique(shared.nonzero()[0]).astype(np.int32)
+        job_ids.flags.writeable = False
+        return Boost(job_ids, 0.2)
+
+    @staticmethod
+    def _load_index(index_dir: Optional[str], name: str, texts: List[str],
+                    ann_config: Optional[dict] = None, rebuild: bool = True) -> CatalogIndex:
+        path = os.path.join(index_dir, f"{name}.pkl") if index_dir else None
+        return CatalogIndex.load_or_build(texts, path, ann_config, rebuild)
+
+class CatalogWatcher:
+    """Polls a catalog file and calls `on_change` in the background when it is modified"""
+
+    def __init__(self, path: str, on_change: Callable[[], Any], interval: float = 5.0):
+        self.path = path
+        self.on_change = on_change
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_seen = self._stat()
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+            return stat.st_mtime_ns, stat.st_size
+        except FileNotFoundError:
+            return None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="catalog-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            current = self._stat()
+            if current is None or current == self._last_seen:
+                continue
+            self._last_seen = current
+            try:
+                self.on_change()
+            except Exception:
+                # Keep serving the current snapshot; the next change triggers another attempt
+                logger.exception("Reloading catalog %s failed", self.path)
@@ -0,0 +1,364 @@
+from typing import TYPE_CHECKING, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from collections import Counter, defaultdict
+from functools import lru_cache
+from app.artifacts import MissingArtifact
+from app.ann import IVFIndex
+from scipy import sparse
+import numpy as np
+import hashlib
+import pickle
+import json
+import os
+
+if TYPE_CHECKING:
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+class Boost(NamedTuple):
+    """A fixed amount added to the scores of some entries, stored as their sorted IDs.
+
+    Boosted entries are usually a small share of a large catalog, so this is
+    much smaller than a dense score array and can be cached per boost.
+    """
+    ids: np.ndarray
+    amount: float
+
+    def of(self, ids: np.ndarray) -> np.ndarray:
+        """The boost of each entry in `ids`"""
+        if not len(self.ids):
+            return np.zeros(len(ids))
+        slots = np.minimum(np.searchsorted(self.ids, ids), len(self.ids) - 1)
+        return np.where(self.ids[slots] == ids, self.amount, 0.0)
+
+class CatalogIndex:
+    """TF-IDF vectors for one catalog, fitted once and only read afterwards.
+
+    Each catalog keeps its own vectorizer so the vocabulary and IDF weights
+    depend only on the catalog, never on the request being scored. Rows are
+    L2-normalised, so a dot product with a transformed query is the cosine
+    similarity.
+
+    The same matrix in column-major form serves as an inverted index from
+    term to the entries containing it, used by `top_k` to score only entries
+    that share terms with the query.
+    """
+
+    def __init__(self, vectorizer: 'TfidfVectorizer', matrix: sparse.csr_matrix, fingerprint: str,
+                 ann: Optional[IVFIndex] = None, ann_config: Optional[dict] = None):
+        self.vectorizer = vectorizer
+        self.matrix = matrix
+        self.fingerprint = fingerprint
+        # Approximate search for very large catalogs, with the settings it was built from
+        self.ann = ann
+        self.ann_config = ann_config
+        self._init_derived()
+
+    def _init_derived(self):
+        # Canonical form up front, so scipy never needs to sort the matrix in place later
+        self.matrix.sum_duplicates()
+        # Posting lists: per term, the sorted entry IDs that contain it and their weights
+        self.postings = self.matrix.tocsc()
+        self.postings.sum_duplicates()
+        # Largest weight of each term in any entry, bounding what the term can add to a score
+        self.term_bounds = self.postings.max(axis=0).toarray()[0]
+        # Requests share these arrays across threads; make accidental writes fail loudly
+        for array in (self.matrix.data, self.matrix.indices, self.matrix.indptr,
+                      self.postings.data, self.postings.indices, self.postings.indptr,
+                      self.term_bounds):
+            array.flags.writeable = False
+
+        self._analyzer = self.vectorizer.build_analyzer()
+        self._idf = self.vectorizer.idf_
+        # Skill names recur across requests, so their term IDs are interned once
+        self.term_ids = lru_cache(maxsize=65536)(self._term_ids)
+
+    def __getstate__(self):
+        # Only the vectorizer and matrix are saved; everything else is derived on load
+        state = self.__dict__.copy()
+        for name in ('postings', 'term_bounds', '_analyzer', '_idf', 'term_ids'):
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_derived()
+
+    @staticmethod
+    def fingerprint_of(texts: List[str]) -> str:
+        """Stable hash of the catalog texts, used to detect stale indexes on disk"""
+        return hashlib.sha256(json.dumps(texts).encode('utf-8')).hexdigest()
+
+    @classmethod
+    def build(cls, texts: List[str], ann_config: Optional[dict] = None) -> 'CatalogIndex':
+        """Fit the catalog; with `ann_config` (IVFIndex.build arguments) also build an ANN index"""
+        # scikit-learn is slow to import and only needed here; unpickling a saved index imports it by itself
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        vectorizer = TfidfVectorizer()
+        matrix = sparse.csr_matrix(vectorizer.fit_transform(texts))
+        index = cls(vectorizer, matrix, cls.fingerprint_of(texts))
+        index.set_ann(ann_config)
+        return index
+
+    def set_ann(self, ann_config: Optional[dict]):
+        self.ann = IVFIndex.build(self.matrix, **ann_config) if ann_config is not None else None
+        self.ann_config = ann_config
+
+    @classmethod
+    def load(cls, path: str, fingerprint: Optional[str] = None) -> Optional['CatalogIndex']:
+        """Load a saved index, or return None if it is missing or was built from other texts"""
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            index = pickle.load(f)
+        if fingerprint is not None and index.fingerprint != fingerprint:
+            return None
+        return index
+
+    @classmethod
+    def load_or_build(cls, texts: List[str], path: Optional[str] = None,
+                      ann_config: Optional[dict] = None, rebuild: bool = True) -> 'CatalogIndex':
+        """Reuse the index saved at `path` when it matches `texts`, otherwise build and save it.
+
+        With `rebuild=False` (prebuilt, possibly read-only artifacts) an index
+        that is missing or doesn't match raises MissingArtifact instead.
+        """
+        if path is None:
+            return cls.build(texts, ann_config)
+        index = cls.load(path, cls.fingerprint_of(texts))
+        if not rebuild and (index is None or index.ann_config != ann_config):
+            raise MissingArtifact(
+                f"Catalog index {path} is missing or was built from another catalog or ANN "
+                f"settings; rebuild the artifacts with `python -m app.artifacts`"
+            )
+        if index is None:
+            index = cls.build(texts, ann_config)
+            index.save(path)
+        elif index.ann_config != ann_config:
+            # Same catalog, different ANN settings: only the ANN part is rebuilt
+            index.set_ann(ann_config)
+            index.save(path)
+        return index
+
+    def save(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Write to a temporary file first so readers never see a partial index
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    def transform(self, text: str) -> sparse.csr_matrix:
+        return self.vectorizer.transform([text])
+
+    def _term_ids(self, skill: str) -> Tuple[Tuple[int, int], ...]:
+        """(term ID, count) pairs for the catalog terms that `skill` tokenizes to"""
+        vocabulary = self.vectorizer.vocabulary_
+        counts = Counter(vocabulary[token] for token in self._analyzer(skill) if token in vocabulary)
+        return tuple(counts.items())
+
+    def query_vector(self, weighted_skills: Dict[str, float]) -> sparse.csr_matrix:
+        """TF-IDF vector for skills with per-skill weights, built directly from term IDs.
+
+        A skill with weight w counts like its text repeated w times, so this
+        equals transforming the weighted skills as text, without building or
+        re-tokenizing that text.
+        """
+        indices, values = self._query_terms(weighted_skills)
+        return sparse.csr_matrix(
+            (values, indices, np.array([0, len(indices)])),
+            shape=(1, self.matrix.shape[1])
+        )
+
+    def query_matrix(self, weighted_skills_list: List[Dict[str, float]]) -> sparse.csr_matrix:
+        """One `query_vector` row per item of `weighted_skills_list`, stacked into a CSR matrix"""
+        rows = [self._query_terms(weighted_skills) for weighted_skills in weighted_skills_list]
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(indices) for indices, _ in rows], out=indptr[1:])
+        indices = np.concatenate([indices for indices, _ in rows]) if rows else np.array([], dtype=np.int32)
+        values = np.concatenate([values for _, values in rows]) if rows else np.array([], dtype=np.float64)
+        return sparse.csr_matrix((values, indices, indptr), shape=(len(rows), self.matrix.shape[1]))
+
+    def _query_terms(self, weighted_skills: Dict[str, float]) -> Tuple[np.ndarray, np.ndarray]:
+        """Sorted term IDs and L2-normalised TF-IDF weights of one query"""
+        term_weights = defaultdict(float)
+        for skill, weight in weighted_skills.items():
+            for term_id, count in self.term_ids(skill):
+                term_weights[term_id] += weight * count
+
+        indices = np.fromiter(term_weights.keys(), dtype=np.int32, count=len(term_weights))
+        values = np.fromiter(term_weights.values(), dtype=np.float64, count=len(term_weights))
+        order = np.argsort(indices)
+        indices, values = indices[order], values[order] * self._idf[indices[order]]
+        norm = np.sqrt(np.dot(values, values))
+        if norm > 0:
+            values /= norm
+        return indices, values
+
+    def similarities(self, query: sparse.csr_matrix) -> np.ndarray:
+        """Cosine similarity between a query vector and every catalog entry"""
+        return (query @ self.matrix.T).toarray()[0]
+
+    def similarity_chunks(self, queries: sparse.csr_matrix,
+                          max_chunk_bytes: int = 64 * 1024 * 1024) -> Iterator[Tuple[int, np.ndarray]]:
+        """Dense cosine similarities of `queries` against every entry, as (first row, block) pairs.
+
+        All rows of a block are scored in one sparse matrix product; blocks hold
+        as many query rows as fit in `max_chunk_bytes`, so memory stays bounded
+        however many queries there are.
+        """
+        rows_per_chunk = max(1, max_chunk_bytes // (8 * max(1, self.matrix.shape[0])))
+        for start in range(0, queries.shape[0], rows_per_chunk):
+            yield start, (queries[start:start + rows_per_chunk] @ self.matrix.T).toarray()
+
+    def top_k_many(self, queries: sparse.csr_matrix, k: int,
+                   boosts: Optional[List[Optional[Boost]]] = None,
+                   max_chunk_bytes: int = 64 * 1024 * 1024) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """`top_k` for every row of `queries`, with `boosts[i]` as the boost of row i.
+
+        Rows are scored a block at a time by `similarity_chunks` and the top k
+        of every row in a block are selected together, so the per-call
+        overhead of `top_k` is paid once per block instead of once per row.
+        Every entry is scored, though, so on large catalogs where pruning
+        skips most entries `top_k` per row can still be faster. Results are
+        the same as from `top_k`, up to floating-point rounding. With an ANN
+        index every row probes its own clusters, so rows are delegated to
+        `top_k` one by one.
+        """
+        n_rows = queries.shape[0]
+        boosts = boosts if boosts is not None else [None] * n_rows
+        if self.ann is not None or k <= 0:
+            return [self.top_k(queries[row], k, boosts[row]) for row in range(n_rows)]
+
+        results = []
+        # Half of the budget each for the similarities and the ranking scores
+        for start, similarities in self.similarity_chunks(queries, max_chunk_bytes // 2):
+            ranked = similarities.copy()
+            for row, boost in enumerate(boosts[start:start + len(similarities)]):
+                if boost is not None:
+                    ranked[row, boost.ids] += boost.amount
+            np.minimum(ranked, 1.0, out=ranked)
+            # Only entries sharing a term with the query are ranked, as in top_k
+            ranked[similarities <= 0] = -np.inf
+            rows, ids = self._select_rows(ranked, k)
+            bounds = np.searchsorted(rows, np.arange(len(similarities) + 1))
+            for row in range(len(similarities)):
+                row_ids = ids[bounds[row]:bounds[row + 1]]
+                results.append((row_ids, similarities[row, row_ids]))
+        return results
+
+    @staticmethod
+    def _select_rows(ranked: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(row, column) pairs of the k best finite scores per row, grouped by row in rank order"""
+        n_columns = ranked.shape[1]
+        k = min(k, n_columns)
+        if k == 0:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+        # Everything scoring at least the k-th best value of its row; ties at the
+        # boundary are resolved below in catalog order
+        kth = np.partition(ranked, n_columns - k, axis=1)[:, n_columns - k]
+        rows, ids = np.nonzero((ranked >= kth[:, None]) & np.isfinite(ranked))
+        order = np.lexsort((ids, -ranked[rows, ids], rows))
+        rows, ids = rows[order], ids[order]
+        rank = np.arange(len(rows)) - np.searchsorted(rows, rows)
+        return rows[rank < k], ids[rank < k]
+
+    def top_k(self, query: sparse.csr_matrix, k: int,
+              boost: Optional[Boost] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Entries with the k highest scores, and their cosine similarities.
+
+        The score of an entry is its similarity plus its `boost`, capped at 1,
+        and only entries sharing at least one term with the query are ranked.
+        With an ANN index only the rows in the closest clusters are scored,
+        exactly; otherwise terms are scored from the posting lists in order of
+        how much they can add. Once the terms left can no longer lift an unseen entry above the
+        current k-th best score, they are only looked up for the candidates
+        that can still reach the top k (MaxScore-style pruning). Ties keep
+        catalog order.
+
+        The posting-list path allocates score arrays of catalog length per
+        query and scans the full posting lists of the first terms, so it is
+        only fast enough below ANN_MIN_ENTRIES; larger catalogs rely on the
+        ANN index to stay within 10 ms.
+        """
+        empty = np.array([], dtype=np.int64), np.array([], dtype=np.float64)
+        if k <= 0 or query.nnz == 0:
+            return empty
+        if self.ann is not None:
+            candidates = self.ann.candidates(query)
+            similarities = (self.matrix[candidates] @ query.T).toarray().ravel()
+            matching = similarities > 0
+            return self._select(candidates[matching], similarities[matching], boost, k)
+
+        terms, weights = query.indices, query.data
+        bounds = weights * self.term_bounds[terms]
+        order = np.argsort(-bounds, kind='stable')
+        terms, weights, bounds = terms[order], weights[order], bounds[order]
+        # remaining[i] is the most that terms i, i+1, ... can add to any score
+        remaining = np.append(np.cumsum(bounds[::-1])[::-1], 0.0)
+        max_boost = boost.amount if boost is not None and len(boost.ids) else 0.0
+
+        indptr, entry_ids, entry_weights = self.postings.indptr, self.postings.indices, self.postings.data
+        scores = np.zeros(self.matrix.shape[0])
+        seen = np.zeros(self.matrix.shape[0], dtype=bool)
+        # Dense boosts for this call only, so the loop below never searches boost.ids
+        boosts = None
+        if boost is not None:
+            boosts = np.zeros(self.matrix.shape[0])
+            boosts[boost.ids] = boost.amount
+        touched = []
+        candidates = None
+
+        for position, (term, weight) in enumerate(zip(terms, weights)):
+            start, end = indptr[term], indptr[term + 1]
+            posting_ids = entry_ids[start:end]
+            if candidates is None:
+                # Entry IDs are unique within a posting list, so fancy-index += is safe
+                scores[posting_ids] += weight * entry_weights[start:end]
+                touched.append(posting_ids[~seen[posting_ids]])
+                seen[posting_ids] = True
+
+                # Switch to candidates-only once an unseen entry can't make the top k
+                threshold = self._kth_score(scores, np.concatenate(touched), boosts, k)
+                if threshold is not None and remaining[position + 1] + max_boost < threshold:
+                    candidates = np.concatenate(touched)
+                    reachable = self._boosted(scores, candidates, boosts) + remaining[position + 1] >= threshold
+                    candidates = candidates[reachable]
+            else:
+                # Look up this term's weight for the remaining candidates only
+                slots = np.searchsorted(posting_ids, candidates)
+                slots[slots == len(posting_ids)] = 0
+                found = posting_ids[slots] == candidates if len(posting_ids) else np.zeros(len(candidates), bool)
+                scores[candidates[found]] += weight * entry_weights[start:end][slots[found]]
+
+        if candidates is None:
+            candidates = np.concatenate(touched)
+        return self._select(candidates, scores[candidates], boost, k)
+
+    @staticmethod
+    def _select(ids: np.ndarray, similarities: np.ndarray, boost: Optional[Boost],
+                k: int) -> Tuple[np.ndarray, np.ndarray]:
+        ranked = np.minimum(similarities + boost.of(ids) if boost is not None else similarities, 1.0)
+        if len(ids) > k:
+            # Keep everything tied with the k-th best so ties are cut in catalog order below
+            kth = np.partition(ranked, len(ranked) - k)[len(ranked) - k]
+            keep = ranked >= kth
+            ids, similarities, ranked = ids[keep], similarities[keep], ranked[keep]
+        order = np.lexsort((ids, -ranked))[:k]
+        return ids[order], similarities[order]
+
+    @staticmethod
+    def _boosted(scores: np.ndarray, ids: np.ndarray, boosts: Optional[np.ndarray]) -> np.ndarray:
+        return scores[ids] + boosts[ids] if boosts is not None else scores[ids]
+
+    def _kth_score(self, scores: np.ndarray, ids: np.ndarray,
+                   boosts: Optional[np.ndarray], k: int) -> Optional[float]:
+        """Lower bound on the final k-th best score, or None while fewer than k entries were seen"""
+        if len(ids) < k:
+            return None
+        ranked = np.minimum(self._boosted(scores, ids, boosts), 1.0)
+        return float(np.partition(ranked, len(ranked) - k)[len(ranked) - k])
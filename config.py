@@ -0,0 +1,121 @@
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+
+def _env_bool(name: str, default: bool = False) -> bool:
+    return os.getenv(name, str(default)).lower() in {"1", "true", "yes", "on"}
+
+
+# Execution layer: one worker pool per pipeline stage.
+# `*_WORKERS` is the number of requests a stage runs at once, `*_QUEUE` is how
+# many more may wait for a free worker before new requests are rejected with 503.
+PARSE_WORKERS = _env_int("PARSE_WORKERS", 4)
+PARSE_QUEUE = _env_int("PARSE_QUEUE", 64)
+PARSE_USE_PROCESSES = _env_bool("PARSE_USE_PROCESSES")
+
+NLP_WORKERS = _env_int("NLP_WORKERS", 2)
+NLP_QUEUE = _env_int("NLP_QUEUE", 64)
+NLP_USE_PROCESSES = _env_bool("NLP_USE_PROCESSES")
+
+RECOMMEND_WORKERS = _env_int("RECOMMEND_WORKERS", 2)
+RECOMMEND_QUEUE = _env_int("RECOMMEND_QUEUE", 64)
+RECOMMEND_USE_PROCESSES = _env_bool("RECOMMEND_USE_PROCESSES")
+
+# Parsing limits: PDF pages read per resume and characters of text kept
+PARSE_MAX_PAGES = _env_int("PARSE_MAX_PAGES", 40)
+PARSE_MAX_CHARS = _env_int("PARSE_MAX_CHARS", 200000)
+
+# Batched NLP (NLPProcessor.analyze_many): documents per spaCy batch and
+# number of spaCy worker processes
+NLP_BATCH_SIZE = _env_int("NLP_BATCH_SIZE", 64)
+NLP_BATCH_PROCESSES = _env_int("NLP_BATCH_PROCESSES", 1)
+
+# Micro-batching of single uploads: documents arriving within
+# NLP_MICROBATCH_WINDOW_MS of each other go through spaCy together, up to
+# NLP_MICROBATCH_MAX_SIZE per batch
+NLP_MICROBATCH_WINDOW_MS = float(os.getenv("NLP_MICROBATCH_WINDOW_MS", 5))
+NLP_MICROBATCH_MAX_SIZE = _env_int("NLP_MICROBATCH_MAX_SIZE", 32)
+
+# Uploads are read in chunks of UPLOAD_CHUNK_SIZE bytes. Anything larger than
+# UPLOAD_SPOOL_THRESHOLD is written to a temp file (memory-mapped for
+# PDFs) instead of being held in RAM; UPLOAD_MAX_SIZE is enforced while reading.
+# UPLOAD_MAX_REQUEST_SIZE caps the whole request body of /upload-resume and is
+# enforced while it is received, before anything is spooled.
+UPLOAD_MAX_SIZE = _env_int("UPLOAD_MAX_SIZE", 10 * 1024 * 1024)
+UPLOAD_MAX_REQUEST_SIZE = _env_int("UPLOAD_MAX_REQUEST_SIZE", UPLOAD_MAX_SIZE + 64 * 1024)
+UPLOAD_SPOOL_THRESHOLD = _env_int("UPLOAD_SPOOL_THRESHOLD", 1024 * 1024)
+UPLOAD_CHUNK_SIZE = _env_int("UPLOAD_CHUNK_SIZE", 256 * 1024)
+
+# Limits for /upload-resumes: resumes per request (after unpacking zip
+# archives), the size of each resume, the size of each zip archive and the
+# size of the whole request body in bytes
+BATCH_MAX_FILES = _env_int("BATCH_MAX_FILES", 500)
+BATCH_MAX_FILE_SIZE = _env_int("BATCH_MAX_FILE_SIZE", 10 * 1024 * 1024)
+BATCH_MAX_ARCHIVE_SIZE = _env_int("BATCH_MAX_ARCHIVE_SIZE", 200 * 1024 * 1024)
+BATCH_MAX_REQUEST_SIZE = _env_int("BATCH_MAX_REQUEST_SIZE", 256 * 1024 * 1024)
+
+# Catalog of job roles, courses, skill weights and industry clusters (.json,
+# .jsonl or SQLite). The file is checked for changes every
+# CATALOG_WATCH_INTERVAL seconds (0 disables watching) and can be reloaded
+# through POST /admin/reload-catalog, which is only enabled when ADMIN_TOKEN is set.
+CATALOG_PATH = os.getenv("CATALOG_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "catalog.json"))
+CATALOG_WATCH_INTERVAL = float(os.getenv("CATALOG_WATCH_INTERVAL", 10))
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN") or None
+
+# Offline startup: directory of prebuilt artifacts (see artifacts.py). When it
+# is set the spaCy model, skill gazetteer and catalog indexes are loaded from
+# there, nothing is downloaded or rebuilt, and a missing artifact or one built
+# from another SKILL_TAXONOMY, CATALOG_PATH or ANN settings stops startup.
+# Otherwise SPACY_MODEL is loaded by name and downloaded if it isn't installed.
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR") or None
+SPACY_MODEL = os.getenv("SPACY_MODEL", "en_core_web_sm")
+
+# Directory where fitted catalog indexes are saved and loaded back at boot,
+# unless ARTIFACT_DIR is set. Set INDEX_DIR to an empty string to keep them in memory only.
+INDEX_DIR = os.getenv("INDEX_DIR", ".index") or None
+
+# Approximate nearest neighbour search for catalogs with at least
+# ANN_MIN_ENTRIES entries. ANN_LISTS clusters (0 = square root of the catalog
+# size) over ANN_DIM projected dimensions; ANN_PROBE clusters are scanned per
+# query, higher is slower with better recall. Exact search over the posting
+# lists is too slow for top_k's 10 ms target above about 200k entries, so
+# don't raise ANN_MIN_ENTRIES much past that.
+ANN_MIN_ENTRIES = _env_int("ANN_MIN_ENTRIES", 200000)
+ANN_CONFIG = {
+    "n_lists": _env_int("ANN_LISTS", 0) or None,
+    "dim": _env_int("ANN_DIM", 256),
+    "n_probe": _env_int("ANN_PROBE", 8)
+}
+
+# Skill taxonomy (canonical name -> aliases) compiled into the skill matcher.
+# The compiled matcher is saved under INDEX_DIR so workers don't rebuild it
+# (with ARTIFACT_DIR set, the prebuilt one is used).
+SKILL_TAXONOMY = os.getenv("SKILL_TAXONOMY", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "skills.json"))
+SKILL_GAZETTEER_CACHE = os.path.join(INDEX_DIR, "skills.pkl") if INDEX_DIR else None
+
+# Result cache: size of the in-memory LRU tier in bytes, and an optional
+# directory for a disk tier shared by all workers on the host. The disk tier
+# is pruned every CACHE_DISK_PRUNE_INTERVAL seconds to entries younger than
+# CACHE_DISK_MAX_AGE seconds and at most CACHE_DISK_MAX_BYTES in total.
+CACHE_MAX_BYTES = _env_int("CACHE_MAX_BYTES", 64 * 1024 * 1024)
+CACHE_DIR = os.getenv("CACHE_DIR") or None
+CACHE_DISK_MAX_BYTES = _env_int("CACHE_DISK_MAX_BYTES", 1024 * 1024 * 1024)
+CACHE_DISK_MAX_AGE = float(os.getenv("CACHE_DISK_MAX_AGE", 7 * 24 * 3600))
+CACHE_DISK_PRUNE_INTERVAL = float(os.getenv("CACHE_DISK_PRUNE_INTERVAL", 60))
+
+# Production launcher (python -m app.serve): address to listen on, number of
+# worker processes forked from the preloaded parent, and how many seconds
+# after startup per-process memory use is logged
+SERVE_HOST = os.getenv("SERVE_HOST", "0.0.0.0")
+SERVE_PORT = _env_int("SERVE_PORT", 8000)
+SERVE_WORKERS = _env_int("SERVE_WORKERS", os.cpu_count() or 1)
+SERVE_MEMORY_REPORT_DELAY = float(os.getenv("SERVE_MEMORY_REPORT_DELAY", 5))
+
+# Seconds before a worker that died is replaced. The delay doubles each time a
+# worker dies within SERVE_RESTART_MAX_DELAY seconds of starting, up to that
+# maximum, so a worker that cannot start is not forked again in a tight loop.
+SERVE_RESTART_DELAY = float(os.getenv("SERVE_RESTART_DELAY", 1))
+SERVE_RESTART_MAX_DELAY = float(os.getenv("SERVE_RESTART_MAX_DELAY", 60))
@@ -0,0 +1,135 @@
+import asyncio
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class StageOverloaded(RuntimeError):
+    """Raised when a stage already has as many requests as it may queue"""
+
+
+class Stage:
+    """A worker pool for one step of the pipeline with bounded concurrency and queueing.
+
+    Work is handed to the pool only while a concurrency slot is free, so requests
+    that are waiting for a worker stay on the event loop where they can still be
+    cancelled, and the pool's own internal queue never grows.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int, use_processes: bool = False):
+        if max_workers < 1:
+            raise ValueError(f"{name} stage needs at least one worker")
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.use_processes = use_processes
+
+        self._executor: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+        self._running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    @property
+    def executor(self) -> Executor:
+        # Pools are created on first use so that nothing is started at import time
+        if self._executor is None:
+            if self.use_processes:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=f"{self.name}-stage"
+                )
+        return self._executor
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run `func` in the stage's pool and wait for its result.
+
+        With a process pool `func` and its arguments must be picklable, so pass
+        module-level functions rather than bound methods of large objects.
+        """
+        if self._waiting >= self.max_queue:
+            self.rejected += 1
+            raise StageOverloaded(f"The {self.name} stage is at capacity, try again later")
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+
+        self._running += 1
+        loop = asyncio.get_running_loop()
+        try:
+            future = self.executor.submit(func, *args, **kwargs)
+        except Exception:
+            self._running -= 1
+            self._slots.release()
+            self.failed += 1
+            raise
+        # The slot is freed when the pool is done with the work, not when this
+        # coroutine stops waiting for it: cancelling a request doesn't stop a
+        # worker that has already started, so its slot stays taken until then
+        future.add_done_callback(lambda done: self._call_soon(loop, self._finished, done))
+        return await asyncio.wrap_future(future, loop=loop)
+
+    @staticmethod
+    def _call_soon(loop: asyncio.AbstractEventLoop, callback: Callable[..., Any], *args):
+        try:
+            loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            # The loop has been closed during shutdown; nothing is left to wake
+            pass
+
+    def _finished(self, future: Future):
+        # Runs on the event loop once a submitted call has finished or was cancelled before it started
+        self._running -= 1
+        self._slots.release()
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            self.failed += 1
+        else:
+            self.completed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "processes": self.use_processes,
+            "running": self._running,
+            "waiting": self._waiting,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected
+        }
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+class Pipeline:
+    """The set of stages a request passes through, keyed by stage name"""
+
+    def __init__(self, *stages: Stage):
+        self.stages = {stage.name: stage for stage in stages}
+
+    def __getitem__(self, name: str) -> Stage:
+        return self.stages[name]
+
+    async def run(self, stage: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+        return await self.stages[stage].run(func, *args, **kwargs)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: stage.stats() for name, stage in self.stages.items()}
+
+    def shutdown(self, wait: bool = True):
+        for stage in self.stages.values():
+            stage.shutdown(wait=wait)
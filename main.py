@@ -1,9 +1,27 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from app.parser import ResumeParser
 from app.nlp_processor import NLPProcessor
 from app.recommender import Recommender
+from app.catalog import CatalogWatcher
+from app.skills import SkillGazetteer
+from app.executor import Pipeline, Stage, StageOverloaded
+from app.cache import ResultCache, content_hash
+from app.uploads import RequestSizeLimit, SpooledUpload, UploadTooLarge
+from app.singleflight import SingleFlight
+from app.batcher import MicroBatcher
+from app.artifacts import INDEX_DIR, SKILLS_FILE, SPACY_DIR, StartupTimer, artifact_path, check_artifacts
+from app import config
 from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Tuple, Union
+from collections import deque
+import asyncio
+import zipfile
+import hmac
+import json
+import io
 import uvicorn
 
 app = FastAPI(title="Resume Analysis API")
@@ -16,35 +34,307 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Refuse oversized upload requests before their bodies are received and spooled
+app.add_middleware(
+    RequestSizeLimit,
+    limits={
+        "/upload-resume": config.UPLOAD_MAX_REQUEST_SIZE,
+        "/upload-resumes": config.BATCH_MAX_REQUEST_SIZE
+    }
+)
+
+ALLOWED_EXTENSIONS = {".pdf", ".doc", ".docx"}
+
+# Initialize processors, timing each phase of startup
+startup = StartupTimer()
+if config.ARTIFACT_DIR:
+    # Offline mode: check every artifact before spending time loading any of them.
+    # Artifacts are only read, never rebuilt; an outdated one stops startup too.
+    check_artifacts(config.ARTIFACT_DIR)
+
+with startup.phase("skills"):
+    skill_gazetteer = SkillGazetteer.load(
+        config.SKILL_TAXONOMY,
+        artifact_path(config.ARTIFACT_DIR, SKILLS_FILE) if config.ARTIFACT_DIR else config.SKILL_GAZETTEER_CACHE,
+        rebuild=config.ARTIFACT_DIR is None
+    )
+with startup.phase("parser"):
+    resume_parser = ResumeParser(
+        max_pages=config.PARSE_MAX_PAGES,
+        max_chars=config.PARSE_MAX_CHARS,
+        skill_gazetteer=skill_gazetteer
+    )
+with startup.phase("nlp"):
+    nlp_processor = NLPProcessor(
+        skill_gazetteer=skill_gazetteer,
+        model=artifact_path(config.ARTIFACT_DIR, SPACY_DIR) if config.ARTIFACT_DIR else config.SPACY_MODEL,
+        download=config.ARTIFACT_DIR is None
+    )
+with startup.phase("catalog"):
+    recommender = Recommender(
+        catalog_path=config.CATALOG_PATH,
+        index_dir=artifact_path(config.ARTIFACT_DIR, INDEX_DIR) if config.ARTIFACT_DIR else config.INDEX_DIR,
+        ann_config=config.ANN_CONFIG,
+        ann_min_entries=config.ANN_MIN_ENTRIES,
+        rebuild_indexes=config.ARTIFACT_DIR is None
+    )
+print(f"Startup: {startup.summary()}")
+
+# CPU-bound stages run in their own pools so the event loop only handles I/O
+pipeline = Pipeline(
+    Stage("parse", config.PARSE_WORKERS, config.PARSE_QUEUE, config.PARSE_USE_PROCESSES),
+    Stage("nlp", config.NLP_WORKERS, config.NLP_QUEUE, config.NLP_USE_PROCESSES),
+    Stage("recommend", config.RECOMMEND_WORKERS, config.RECOMMEND_QUEUE, config.RECOMMEND_USE_PROCESSES),
+)
+
+# Results are keyed on the upload bytes plus the versions of everything that produced them
+result_cache = ResultCache(
+    config.CACHE_MAX_BYTES, config.CACHE_DIR,
+    config.CACHE_DISK_MAX_BYTES, config.CACHE_DISK_MAX_AGE, config.CACHE_DISK_PRUNE_INTERVAL
+)
+
+# Identical uploads that arrive while one of them is being processed wait for
+# that one instead of running the pipeline again
+single_flight = SingleFlight()
+
+# Single uploads arriving within a few milliseconds of each other share one spaCy
+# batch, one batcher per analysis mode and selection of fields since a batch runs
+# one set of pipeline components
+nlp_batchers: Dict[Tuple[str, Tuple[str, ...]], MicroBatcher] = {}
+
+def _nlp_batcher(fields: Tuple[str, ...], mode: str) -> MicroBatcher:
+    batcher = nlp_batchers.get((mode, fields))
+    if batcher is None:
+        batcher = nlp_batchers[(mode, fields)] = MicroBatcher(
+            lambda parsed_documents: pipeline.run("nlp", _analyze_batch, parsed_documents, fields, mode),
+            max_batch_size=config.NLP_MICROBATCH_MAX_SIZE,
+            window=config.NLP_MICROBATCH_WINDOW_MS / 1000,
+            no_retry=(StageOverloaded,)
+        )
+    return batcher
+
+def _analysis_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    """Analysis fields from a comma-separated list; skills are always included for recommendations"""
+    if fields is None:
+        return nlp_processor.select_fields()
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    try:
+        return nlp_processor.select_fields(requested | {"skills"})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _analysis_mode(mode: str) -> str:
+    try:
+        return nlp_processor.check_mode(mode)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _cache_keys(digest: str, fields: Tuple[str, ...], mode: str) -> Dict[str, str]:
+    parse_key = f"parse:{resume_parser.version}:{digest}"
+    analyze_key = f"analyze:{nlp_processor.version}:{mode}:{','.join(fields)}:{parse_key}"
+    recommend_key = f"recommend:{recommender.format_version}:{recommender.catalog_version}:{analyze_key}"
+    return {"parse": parse_key, "analyze": analyze_key, "recommend": recommend_key}
 
-# Initialize processors
-resume_parser = ResumeParser()
-nlp_processor = NLPProcessor()
-recommender = Recommender()
+# Stage entry points are module-level functions so process pools can pickle them
+def _parse(content, file_extension: str):
+    return resume_parser.parse(content, file_extension)
+
+def _recommend(analyzed_data: dict):
+    return recommender.get_recommendations(analyzed_data)
+
+def _analyze_batch(parsed_documents: List[dict], fields: Optional[Tuple[str, ...]] = None,
+                   mode: str = "full"):
+    return list(nlp_processor.analyze_many(
+        parsed_documents,
+        batch_size=config.NLP_BATCH_SIZE,
+        n_process=config.NLP_BATCH_PROCESSES,
+        fields=fields,
+        mode=mode
+    ))
+
+def _recommend_batch(analyzed_documents: List[dict]):
+    return recommender.get_recommendations_many(analyzed_documents)
+
+class _ZipMember(NamedTuple):
+    """A resume inside an uploaded zip archive, decompressed only when it is parsed"""
+    archive: Union[bytes, str]
+    name: str
+
+def _open_zip(source: Union[bytes, str]) -> zipfile.ZipFile:
+    return zipfile.ZipFile(io.BytesIO(source) if isinstance(source, bytes) else source)
+
+def _read_zip_member(member: _ZipMember) -> Tuple[bytes, str]:
+    with _open_zip(member.archive) as archive:
+        content = archive.read(member.name)
+    return content, content_hash(content)
+
+def _unpack_zip(source) -> List[Tuple[str, str, _ZipMember, None]]:
+    """List the resumes in a zip archive as (filename, extension, member, digest) items.
+
+    Only the archive directory is read here; each member is decompressed when
+    it is parsed, and its digest is computed then.
+    """
+    items = []
+    with _open_zip(source) as archive:
+        for info in archive.infolist():
+            file_extension = Path(info.filename).suffix.lower()
+            if info.is_dir() or file_extension not in ALLOWED_EXTENSIONS:
+                continue
+            # Check the declared size before decompressing anything
+            if info.file_size > config.BATCH_MAX_FILE_SIZE:
+                raise ValueError(f"{info.filename} is larger than {config.BATCH_MAX_FILE_SIZE} bytes")
+            if len(items) >= config.BATCH_MAX_FILES:
+                raise ValueError(f"Archive contains more than {config.BATCH_MAX_FILES} resumes")
+            items.append((info.filename, file_extension, _ZipMember(source, info.filename), None))
+    return items
+
+def _ndjson(record: dict) -> str:
+    return json.dumps(record) + "\n"
+
+# Rebuilds the catalog snapshot in the background when the catalog file changes
+catalog_watcher = (
+    CatalogWatcher(config.CATALOG_PATH, recommender.reload, config.CATALOG_WATCH_INTERVAL)
+    if config.CATALOG_WATCH_INTERVAL > 0 else None
+)
+
+@app.on_event("startup")
+def start_catalog_watcher():
+    if catalog_watcher is not None:
+        catalog_watcher.start()
+
+@app.on_event("shutdown")
+def shutdown_pipeline():
+    if catalog_watcher is not None:
+        catalog_watcher.stop()
+    pipeline.shutdown(wait=False)
+
+@app.post("/admin/reload-catalog")
+async def reload_catalog(x_admin_token: str = Header(None)):
+    """Rebuild the catalog snapshot from disk and swap it in once it is ready.
+
+    Only available when ADMIN_TOKEN is set; a rebuild is expensive, so the
+    endpoint is never left open.
+    """
+    if config.ADMIN_TOKEN is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token, config.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    try:
+        snapshot = await run_in_threadpool(recommender.reload)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Catalog reload failed, keeping the current catalog: {e}")
+    return {
+        "status": "success",
+        "catalog_version": snapshot.version,
+        "job_roles": len(snapshot.job_roles),
+        "courses": len(snapshot.courses)
+    }
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        "startup": startup.phases,
+        "stages": pipeline.stats(),
+        "cache": result_cache.stats(),
+        "single_flight": single_flight.stats(),
+        "nlp_batchers": {
+            f"{mode}:{','.join(fields)}": batcher.stats() for (mode, fields), batcher in nlp_batchers.items()
+        }
+    }
+
+# The disk tier reads and writes files, so with it enabled cache calls run
+# off the event loop; memory-only lookups are cheap enough to stay on it
+async def _cache_get(key: str) -> Any:
+    if result_cache.disk_dir:
+        return await run_in_threadpool(result_cache.get, key)
+    return result_cache.get(key)
+
+async def _cache_set(key: str, value: Any):
+    if result_cache.disk_dir:
+        await run_in_threadpool(result_cache.set, key, value)
+    else:
+        result_cache.set(key, value)
+
+async def _cached_stage(key: str, stage: str, func, *args) -> Any:
+    value = await _cache_get(key)
+    if value is None:
+        value = await pipeline.run(stage, func, *args)
+        await _cache_set(key, value)
+    return value
+
+async def _process_resume(upload: SpooledUpload, file_extension: str,
+                          fields: Tuple[str, ...], mode: str) -> Tuple[dict, dict]:
+    """Run one resume through parse, NLP and recommendation, reusing cached stage results.
+
+    Concurrent uploads of the same content share one run, keyed like its
+    final cache entry. The upload is cleaned up once it is no longer needed.
+    """
+    keys = _cache_keys(upload.digest, fields, mode)
+    handed_off = False
+
+    def start():
+        # The shared run reads this upload, so it cleans it up when it finishes,
+        # even if this request goes away before then
+        nonlocal handed_off
+        handed_off = True
+        return _run_stages(upload, keys, file_extension, fields, mode)
+
+    try:
+        # A repeat upload is answered from the final stage without touching the others
+        cached = await _cache_get(keys["recommend"])
+        if cached is not None:
+            return cached
+        return await single_flight.do(keys["recommend"], start)
+    finally:
+        if not handed_off:
+            upload.cleanup()
+
+async def _run_stages(upload: SpooledUpload, keys: Dict[str, str], file_extension: str,
+                      fields: Tuple[str, ...], mode: str) -> Tuple[dict, dict]:
+    try:
+        analyzed_data = await _cache_get(keys["analyze"])
+        if analyzed_data is None:
+            parsed_data = await _cached_stage(keys["parse"], "parse", _parse, upload.source, file_extension)
+            analyzed_data = await _nlp_batcher(fields, mode).submit(parsed_data)
+            await _cache_set(keys["analyze"], analyzed_data)
+
+        recommendations = await pipeline.run("recommend", _recommend, analyzed_data)
+        await _cache_set(keys["recommend"], (analyzed_data, recommendations))
+        return analyzed_data, recommendations
+    finally:
+        upload.cleanup()
 
 @app.post("/upload-resume")
-async def upload_resume(file: UploadFile = File(...)):
+async def upload_resume(file: UploadFile = File(...), fields: Optional[str] = Query(None),
+                        mode: str = Query("full")):
+    """Analyze one resume and recommend jobs and courses for it.
+
+    `fields` is a comma-separated subset of the analysis fields (skills,
+    key_phrases, entities, summary) to compute; by default all of them are.
+    Skills are always included because recommendations are based on them.
+    `mode` is "full" or "fast"; fast mode skips the dependency parser and
+    approximates the parse-based skills, key phrases and summary.
+    """
     try:
+        analysis_fields = _analysis_fields(fields)
+        analysis_mode = _analysis_mode(mode)
+
         # Validate file extension
-        allowed_extensions = {".pdf", ".doc", ".docx"}
         file_extension = Path(file.filename).suffix.lower()
-        if file_extension not in allowed_extensions:
+        if file_extension not in ALLOWED_EXTENSIONS:
             raise HTTPException(
                 status_code=400,
-                detail=f"Invalid file format. Allowed formats: {', '.join(allowed_extensions)}"
+                detail=f"Invalid file format. Allowed formats: {', '.join(ALLOWED_EXTENSIONS)}"
             )
 
-        # Read and process the resume
-        content = await file.read()
-        
-        # Parse resume content
-        parsed_data = resume_parser.parse(content, file_extension)
-        
-        # Process with NLP
-        analyzed_data = nlp_processor.analyze(parsed_data)
-        
-        # Generate recommendations
-        recommendations = recommender.get_recommendations(analyzed_data)
+        # Read the resume in chunks; large uploads are spooled to disk
+        upload = await SpooledUpload.read(
+            file, config.UPLOAD_MAX_SIZE, config.UPLOAD_SPOOL_THRESHOLD, config.UPLOAD_CHUNK_SIZE
+        )
+        # Parse, analyze and generate recommendations
+        analyzed_data, recommendations = await _process_resume(
+            upload, file_extension, analysis_fields, analysis_mode
+        )
         
         return {
             "status": "success",
@@ -54,8 +344,161 @@ async def upload_resume(file: UploadFile = File(...)):
             }
         }
 
+    except HTTPException:
+        raise
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except StageOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/upload-resumes")
+async def upload_resumes(files: List[UploadFile] = File(...), fields: Optional[str] = Query(None),
+                         mode: str = Query("full")):
+    """Analyze many resumes, uploaded as separate files or as zip archives.
+
+    Results are streamed back as NDJSON, one line per resume, in the order the
+    resumes finish rather than the order they were uploaded. `fields` and
+    `mode` select the analysis as for /upload-resume.
+    """
+    analysis_fields = _analysis_fields(fields)
+    analysis_mode = _analysis_mode(mode)
+    items = []
+    # Uploads spooled to temp files, removed when the stream ends. In-memory
+    # uploads aren't tracked, so their bytes can be freed once they are parsed.
+    uploads = []
+    try:
+        for file in files:
+            file_extension = Path(file.filename).suffix.lower()
+            if file_extension == ".zip":
+                upload = await SpooledUpload.read(
+                    file, config.BATCH_MAX_ARCHIVE_SIZE, config.UPLOAD_SPOOL_THRESHOLD, config.UPLOAD_CHUNK_SIZE
+                )
+                # Members are read from the archive as they are parsed, so it is kept until the stream ends
+                if upload.on_disk:
+                    uploads.append(upload)
+                items.extend(await pipeline.run("parse", _unpack_zip, upload.source))
+            elif file_extension in ALLOWED_EXTENSIONS:
+                upload = await SpooledUpload.read(
+                    file, config.BATCH_MAX_FILE_SIZE, config.UPLOAD_SPOOL_THRESHOLD, config.UPLOAD_CHUNK_SIZE
+                )
+                if upload.on_disk:
+                    uploads.append(upload)
+                items.append((file.filename, file_extension, upload.source, upload.digest))
+            else:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Invalid file format for {file.filename}. "
+                           f"Allowed formats: {', '.join(ALLOWED_EXTENSIONS)}, .zip"
+                )
+
+        if len(items) > config.BATCH_MAX_FILES:
+            raise HTTPException(status_code=413, detail=f"At most {config.BATCH_MAX_FILES} resumes per request")
+    except BaseException as e:
+        for upload in uploads:
+            upload.cleanup()
+        if isinstance(e, UploadTooLarge):
+            raise HTTPException(status_code=413, detail=str(e))
+        if isinstance(e, StageOverloaded):
+            raise HTTPException(status_code=503, detail=str(e))
+        if isinstance(e, (ValueError, zipfile.BadZipFile)):
+            raise HTTPException(status_code=400, detail=str(e))
+        raise
+
+    return StreamingResponse(_process_batch(items, uploads, analysis_fields, analysis_mode), media_type="application/x-ndjson")
+
+async def _process_batch(items: List[Tuple[str, str, Any, str]], uploads: List[SpooledUpload],
+                         fields: Tuple[str, ...], mode: str) -> AsyncIterator[str]:
+    """Parse items in parallel and send whatever has been parsed through batched NLP"""
+    # Items are dropped as they are submitted, so in-memory content can be freed once parsed
+    remaining = deque(items)
+    del items
+    in_flight = {}
+    parsed = []
+
+    async def parse_item(content, file_extension: str, digest: Optional[str]):
+        # Zip members are decompressed only now; their digest is known once they are
+        if isinstance(content, _ZipMember):
+            content, digest = await pipeline.run("parse", _read_zip_member, content)
+        keys = _cache_keys(digest, fields, mode)
+        cached = await _cache_get(keys["recommend"])
+        if cached is not None:
+            return keys, cached, None
+        return keys, None, await _cached_stage(keys["parse"], "parse", _parse, content, file_extension)
+
+    async def analyze_and_recommend(documents: List[dict]) -> List[Tuple[dict, dict]]:
+        analyzed = await pipeline.run("nlp", _analyze_batch, documents, fields, mode)
+        return list(zip(analyzed, await pipeline.run("recommend", _recommend_batch, analyzed)))
+
+    def submit_parses():
+        # Keep a bounded number of parses in flight so a large batch cannot fill the stage queue
+        while remaining and len(in_flight) < config.PARSE_WORKERS * 2:
+            filename, file_extension, content, digest = remaining.popleft()
+            task = asyncio.ensure_future(parse_item(content, file_extension, digest))
+            in_flight[task] = filename
+
+    try:
+        submit_parses()
+        while in_flight or parsed:
+            if in_flight:
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    filename = in_flight.pop(task)
+                    if task.exception() is not None:
+                        yield _ndjson({"filename": filename, "status": "error", "detail": str(task.exception())})
+                        continue
+                    keys, cached, parsed_data = task.result()
+                    if cached is not None:
+                        yield _ndjson(_success_record(filename, *cached))
+                    else:
+                        parsed.append((filename, keys, parsed_data))
+                submit_parses()
+
+            # Everything parsed since the last NLP batch forms the next batch, so
+            # batches grow on their own while NLP is the bottleneck
+            if parsed:
+                batch, parsed = parsed[:config.NLP_BATCH_SIZE], parsed[config.NLP_BATCH_SIZE:]
+                try:
+                    outcomes = await analyze_and_recommend([data for _, _, data in batch])
+                except Exception as e:
+                    if len(batch) == 1 or isinstance(e, StageOverloaded):
+                        outcomes = [e] * len(batch)
+                    else:
+                        # One bad document fails its whole batch; retry each on its own so
+                        # only that one is reported, as MicroBatcher does for single uploads
+                        outcomes = [
+                            outcome if isinstance(outcome, BaseException) else outcome[0]
+                            for outcome in await asyncio.gather(
+                                *(analyze_and_recommend([data]) for _, _, data in batch),
+                                return_exceptions=True
+                            )
+                        ]
+
+                for (filename, keys, _), outcome in zip(batch, outcomes):
+                    if isinstance(outcome, BaseException):
+                        yield _ndjson({"filename": filename, "status": "error", "detail": str(outcome)})
+                        continue
+                    analyzed_data, recommended = outcome
+                    await _cache_set(keys["analyze"], analyzed_data)
+                    await _cache_set(keys["recommend"], (analyzed_data, recommended))
+                    yield _ndjson(_success_record(filename, analyzed_data, recommended))
+    finally:
+        # The client may disconnect mid-stream; don't leave parses running for nobody
+        for task in in_flight:
+            task.cancel()
+        for upload in uploads:
+            upload.cleanup()
+
+def _success_record(filename: str, analyzed_data: dict, recommendations: dict) -> dict:
+    return {
+        "filename": filename,
+        "status": "success",
+        "data": {
+            "parsed_info": analyzed_data,
+            "recommendations": recommendations
+        }
+    }
+
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
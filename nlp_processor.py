@@ -1,66 +1,219 @@
-from typing import Dict, Any
-from nltk.tokenize import word_tokenize, sent_tokenize
-from nltk.corpus import stopwords
-from nltk.tag import pos_tag
-import spacy
-import nltk
+from typing import TYPE_CHECKING, Dict, Any, Callable, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+from app.artifacts import MissingArtifact
+from app.skills import SkillGazetteer
+
+if TYPE_CHECKING:
+    from spacy.tokens import Doc
+
+# spaCy components each built-in extractor reads: part-of-speech tags come from
+# the tagger and attribute_ruler, noun chunks, sentences and dependencies from
+# the parser, and entities from ner
+_POS_COMPONENTS = frozenset({'tagger', 'attribute_ruler'})
+EXTRACTOR_COMPONENTS = {
+    'skills': _POS_COMPONENTS | {'parser'},
+    'key_phrases': _POS_COMPONENTS | {'parser'},
+    'entities': frozenset({'ner'}),
+    'summary': frozenset({'parser', 'ner'})
+}
+
+# Analysis modes. "full" runs the dependency parser; "fast" never does: skills
+# and key phrases come from part-of-speech rules, and sentence boundaries from
+# the much cheaper senter. Taxonomy skills are the same in both modes, but
+# proper-noun skills, key phrases and the summary only approximate the
+# parse-based ones, and entities can differ where sentence boundaries do
+# (SPACY_MODEL=en_core_web_sm python -m app.benchmarks.bench_nlp_modes
+# measures the throughput of each mode and how closely they agree).
+MODES = ('full', 'fast')
 
 class NLPProcessor:
-    def __init__(self):
-        # Download required NLTK data
-        try:
-            nltk.data.find('tokenizers/punkt')
-        except LookupError:
-            nltk.download('punkt')
-        try:
-            nltk.data.find('taggers/averaged_perceptron_tagger')
-        except LookupError:
-            nltk.download('averaged_perceptron_tagger')
-        try:
-            nltk.data.find('corpora/stopwords')
-        except LookupError:
-            nltk.download('stopwords')
+    # Bump whenever analysis output changes so cached results are not reused
+    format_version = "1"
+
+    def __init__(self, skill_gazetteer: Optional[SkillGazetteer] = None,
+                 model: str = 'en_core_web_sm', download: bool = True):
+        """Load the spaCy pipeline `model`, an installed package name or a directory.
+
+        With `download=False` a missing model raises MissingArtifact instead
+        of being downloaded, so offline startup fails fast rather than hanging.
+        """
+        # spaCy takes seconds to import; doing it here keeps importing this module cheap
+        import spacy
 
         # Load spaCy model
         try:
-            self.nlp = spacy.load('en_core_web_sm')
+            self.nlp = spacy.load(model)
         except OSError:
+            if not download:
+                raise MissingArtifact(f"spaCy model {model} not found")
             print("Downloading spaCy model...")
-            spacy.cli.download('en_core_web_sm')
-            self.nlp = spacy.load('en_core_web_sm')
+            from spacy.cli import download as download_model
+            download_model(model)
+            self.nlp = spacy.load(model)
 
-        self.stop_words = set(stopwords.words('english'))
+        # Fast mode takes sentence boundaries from the senter, which en_core_web_sm
+        # ships disabled. It is enabled here and disabled per call in full mode;
+        # pipelines without one get the rule-based sentencizer instead.
+        if 'senter' in self.nlp.component_names:
+            if 'senter' in self.nlp.disabled:
+                self.nlp.enable_pipe('senter')
+            self.sentence_component = 'senter'
+        else:
+            # Ahead of the entity recognizer, which respects sentence boundaries like the senter's
+            self.nlp.add_pipe('sentencizer', before='ner' if 'ner' in self.nlp.pipe_names else None)
+            self.sentence_component = 'sentencizer'
 
-    def analyze(self, parsed_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Analyze parsed resume data using NLP techniques"""
-        raw_text = parsed_data.get('raw_text', '')
-        
-        analyzed_data = {
-            'skills': self._extract_skills(raw_text),
-            'key_phrases': self._extract_key_phrases(raw_text),
-            'entities': self._extract_entities(raw_text),
-            'summary': self._generate_summary(raw_text)
+        self.skill_gazetteer = skill_gazetteer if skill_gazetteer is not None else SkillGazetteer.load()
+
+        # Identifies the analysis code, model and skill taxonomy in cache keys
+        self.version = (
+            f"{self.format_version}:{self.nlp.meta['lang']}_{self.nlp.meta['name']}-{self.nlp.meta['version']}"
+            f":{(self.skill_gazetteer.fingerprint or '')[:12]}"
+        )
+
+        # Extractors all read from the same parsed Doc, keyed by output field,
+        # along with the spaCy components they need (None: the whole pipeline)
+        self.extractors: Dict[str, Callable[['Doc'], Any]] = {
+            'skills': self._extract_skills,
+            'key_phrases': self._extract_key_phrases,
+            'entities': self._extract_entities,
+            'summary': self._generate_summary
         }
+        self.extractor_components: Dict[str, Optional[FrozenSet[str]]] = dict(EXTRACTOR_COMPONENTS)
+        # Fast mode replaces the extractors that read the parse
+        sentences = frozenset({self.sentence_component})
+        self.fast_extractors: Dict[str, Callable[['Doc'], Any]] = {
+            'skills': self._extract_skills_fast,
+            'key_phrases': self._extract_key_phrases_fast
+        }
+        self.fast_extractor_components: Dict[str, Optional[FrozenSet[str]]] = {
+            'skills': _POS_COMPONENTS,
+            'key_phrases': _POS_COMPONENTS | sentences,
+            'entities': frozenset({'ner'}),
+            'summary': sentences | {'ner'}
+        }
+
+    def register_extractor(self, name: str, extractor: Callable[['Doc'], Any],
+                           components: Optional[Iterable[str]] = None):
+        """Add or replace an extractor; its output is stored under `name`.
 
-        return analyzed_data
+        `components` names the spaCy components the extractor reads from; by
+        default the full pipeline runs whenever the extractor is selected.
+        The same extractor serves both modes; fast mode still skips the parser.
+        """
+        self.extractors[name] = extractor
+        self.extractor_components[name] = frozenset(components) if components is not None else None
+        self.fast_extractors.pop(name, None)
+        self.fast_extractor_components[name] = self.extractor_components[name]
 
-    def _extract_skills(self, text: str) -> list:
+    def select_fields(self, fields: Optional[Iterable[str]] = None) -> Tuple[str, ...]:
+        """The requested output fields in extractor order, or all of them for None"""
+        if fields is None:
+            return tuple(self.extractors)
+        fields = set(fields)
+        unknown = fields - set(self.extractors)
+        if unknown:
+            raise ValueError(
+                f"Unknown analysis fields: {', '.join(sorted(unknown))}. "
+                f"Available: {', '.join(self.extractors)}"
+            )
+        return tuple(name for name in self.extractors if name in fields)
+
+    @staticmethod
+    def check_mode(mode: str) -> str:
+        if mode not in MODES:
+            raise ValueError(f"Unknown analysis mode: {mode}. Available: {', '.join(MODES)}")
+        return mode
+
+    def disabled_components(self, fields: Iterable[str], mode: str = 'full') -> List[str]:
+        """Pipeline components none of the extractors for `fields` needs in `mode`"""
+        components_by_field = self.fast_extractor_components if mode == 'fast' else self.extractor_components
+        needed = set()
+        for name in fields:
+            components = components_by_field[name]
+            if components is None:
+                needed = set(self.nlp.pipe_names)
+                break
+            needed |= components
+        # Each mode has one source of sentence boundaries: the parser or the senter
+        needed.discard('parser' if mode == 'fast' else self.sentence_component)
+        # Components that feed on a shared layer such as tok2vec need it to run too
+        for name, component in self.nlp.pipeline:
+            if needed & set(getattr(component, 'listening_components', ())):
+                needed.add(name)
+        return [name for name in self.nlp.pipe_names if name not in needed]
+
+    def analyze(self, parsed_data: Dict[str, Any], fields: Optional[Iterable[str]] = None,
+                mode: str = 'full') -> Dict[str, Any]:
+        """Analyze parsed resume data using NLP techniques.
+
+        Only the requested `fields` are computed (all of them by default), and
+        spaCy skips the components none of them needs. `mode` is one of MODES.
+        """
+        raw_text = parsed_data.get('raw_text', '')
+        fields = self.select_fields(fields)
+        mode = self.check_mode(mode)
+
+        # Run the spaCy pipeline once and share the Doc with every extractor. Components
+        # are disabled per call rather than with nlp.select_pipes, which would change
+        # the pipeline for every thread sharing it.
+        doc = self.nlp(raw_text, disable=self.disabled_components(fields, mode))
+        return self._analyze_doc(doc, fields, mode)
+
+    def analyze_many(self, parsed_documents: Iterable[Dict[str, Any]], batch_size: int = 64,
+                     n_process: int = 1, fields: Optional[Iterable[str]] = None,
+                     mode: str = 'full') -> Iterator[Dict[str, Any]]:
+        """Analyze many parsed resumes, streaming them through spaCy in batches.
+
+        Results are yielded lazily and in the same order as the input, so large
+        collections can be processed without holding every Doc in memory.
+        With `n_process > 1` spaCy spreads the batches over worker processes.
+        """
+        fields = self.select_fields(fields)
+        mode = self.check_mode(mode)
+        texts = (parsed_data.get('raw_text', '') for parsed_data in parsed_documents)
+        docs = self.nlp.pipe(
+            texts, batch_size=batch_size, n_process=n_process, disable=self.disabled_components(fields, mode)
+        )
+        for doc in docs:
+            yield self._analyze_doc(doc, fields, mode)
+
+    def _analyze_doc(self, doc: 'Doc', fields: Iterable[str], mode: str = 'full') -> Dict[str, Any]:
+        extractors = {**self.extractors, **self.fast_extractors} if mode == 'fast' else self.extractors
+        return {name: extractors[name](doc) for name in fields}
+
+    def _extract_skills(self, doc: 'Doc') -> list:
         """Extract technical skills and competencies"""
-        doc = self.nlp(text)
-        skills = []
+        # Known skills and aliases from the taxonomy, as canonical names
+        skills = self.skill_gazetteer.extract(doc.text)
 
-        # Extract noun phrases as potential skills
+        # Proper-noun phrases the taxonomy doesn't know yet (tools, frameworks)
         for chunk in doc.noun_chunks:
-            if not any(word.is_stop for word in chunk):
-                skills.append(chunk.text)
+            if chunk.root.pos_ != 'PROPN' or any(word.is_stop for word in chunk):
+                continue
+            skills.append(self.skill_gazetteer.canonical(chunk.text) or chunk.text)
+
+        # Remove duplicates, keeping the order of first mention
+        return list(dict.fromkeys(skills))
 
-        # Filter and clean skills
-        skills = list(set(skills))  # Remove duplicates
-        return skills
+    def _extract_skills_fast(self, doc: 'Doc') -> list:
+        """Extract skills without a parse: taxonomy matches plus runs of proper nouns"""
+        skills = self.skill_gazetteer.extract(doc.text)
 
-    def _extract_key_phrases(self, text: str) -> list:
+        # Runs of proper nouns stand in for noun chunks headed by a proper noun
+        run = []
+        for token in [*doc, None]:
+            if token is not None and token.pos_ == 'PROPN' and not token.is_stop:
+                run.append(token)
+            elif run:
+                text = doc[run[0].i:run[-1].i + 1].text
+                skills.append(self.skill_gazetteer.canonical(text) or text)
+                run = []
+
+        # Remove duplicates, keeping the order of first mention
+        return list(dict.fromkeys(skills))
+
+    def _extract_key_phrases(self, doc: 'Doc') -> list:
         """Extract important key phrases from the text"""
-        doc = self.nlp(text)
         key_phrases = []
 
         # Extract verb phrases and their associated noun phrases
@@ -72,9 +225,18 @@ class NLPProcessor:
 
         return key_phrases
 
-    def _extract_entities(self, text: str) -> Dict[str, list]:
+    def _extract_key_phrases_fast(self, doc: 'Doc') -> list:
+        """Extract key phrases without a parse: every sentence that contains a verb"""
+        # A sentence's main verb usually governs the whole sentence, so the
+        # sentence approximates the verb's subtree
+        return [
+            ' '.join(token.text for token in sent)
+            for sent in doc.sents
+            if any(token.pos_ == 'VERB' for token in sent)
+        ]
+
+    def _extract_entities(self, doc: 'Doc') -> Dict[str, list]:
         """Extract named entities (organizations, dates, etc.)"""
-        doc = self.nlp(text)
         entities = {}
 
         for ent in doc.ents:
@@ -84,10 +246,11 @@ class NLPProcessor:
 
         return entities
 
-    def _generate_summary(self, text: str) -> str:
+    def _generate_summary(self, doc: 'Doc') -> str:
         """Generate a brief summary of the resume"""
-        doc = self.nlp(text)
         sentences = list(doc.sents)
+        if not sentences:
+            return ''
 
         # Simple extractive summarization
         # Select first sentence and any sentences with important entities
@@ -1,42 +1,195 @@
 import PyPDF2
-from docx import Document
-from typing import Dict, Any
+from app.skills import SkillGazetteer
+from typing import Dict, Any, BinaryIO, Iterator, Optional, Union
+from contextlib import contextmanager
+from xml.etree import ElementTree
+import zipfile
+import mmap
+import io
+import os
+import re
+
+# Resume content: raw bytes, a path to the file, an open binary file or an mmap
+ResumeSource = Union[bytes, str, os.PathLike, BinaryIO, mmap.mmap]
+
+# WordprocessingML tags used by the streaming DOCX reader
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_W_P, _W_T, _W_TAB, _W_BR, _W_CR = _W + 'p', _W + 't', _W + 'tab', _W + 'br', _W + 'cr'
+_W_TR, _W_TC = _W + 'tr', _W + 'tc'
+# Subtrees that never carry visible body text: paragraph properties (which hold
+# tab stop definitions) and the legacy copy of text boxes kept for old readers
+_DOCX_SKIPPED = {
+    _W + 'pPr',
+    '{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback'
+}
+_DOCX_HEADER = re.compile(r'word/header\d*\.xml$')
+_DOCX_FOOTER = re.compile(r'word/footer\d*\.xml$')
 
 class ResumeParser:
-    def __init__(self):
+    # Bump whenever parsing output changes so cached results are not reused
+    format_version = "5"
+
+    def __init__(self, max_pages: Optional[int] = None, max_chars: Optional[int] = None,
+                 skill_gazetteer: Optional[SkillGazetteer] = None):
+        # Resumes put what matters up front, so long portfolios are cut short
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+        self.skill_gazetteer = skill_gazetteer if skill_gazetteer is not None else SkillGazetteer.load()
+        # Identifies the parsing code and skill taxonomy in cache keys
+        self.version = f"{self.format_version}:{(self.skill_gazetteer.fingerprint or '')[:12]}"
         self.supported_formats = {
             ".pdf": self._parse_pdf,
             ".doc": self._parse_doc,
             ".docx": self._parse_doc
         }
 
-    def parse(self, content: bytes, file_extension: str) -> Dict[str, Any]:
+    def parse(self, content: ResumeSource, file_extension: str) -> Dict[str, Any]:
         """Parse resume content based on file type"""
         if file_extension not in self.supported_formats:
             raise ValueError(f"Unsupported file format: {file_extension}")
 
         parser_func = self.supported_formats[file_extension]
-        text_content = parser_func(content)
+        with self._open_source(content, allow_mmap=file_extension == ".pdf") as stream:
+            text_content = parser_func(stream)
 
         # Extract basic information
         return self._extract_information(text_content)
 
-    def _parse_pdf(self, content: bytes) -> str:
+    @staticmethod
+    @contextmanager
+    def _open_source(content: ResumeSource, allow_mmap: bool = True) -> Iterator[BinaryIO]:
+        """Present any resume source as a seekable binary stream without copying it.
+
+        Files on disk are memory-mapped, so the readers page in only the parts
+        of the file they actually touch. Readers that need a real file object,
+        like zipfile (mmap has no seekable() before Python 3.13), pass
+        `allow_mmap=False` and get the open file instead.
+        """
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            # BytesIO shares the buffer of an immutable bytes object until written to
+            yield io.BytesIO(content)
+        elif isinstance(content, (str, os.PathLike)):
+            with open(content, 'rb') as f:
+                if not allow_mmap or os.fstat(f.fileno()).st_size == 0:
+                    yield f
+                else:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                        yield mapped
+        elif isinstance(content, mmap.mmap) and not allow_mmap:
+            yield io.BytesIO(memoryview(content))
+        else:
+            content.seek(0)
+            yield content
+
+    def iter_pdf_pages(self, content: ResumeSource) -> Iterator[str]:
+        """Yield the text of each PDF page, reading pages only as they are requested.
+
+        Stops after `max_pages` pages, or once `max_chars` characters have been
+        produced; the page that crosses the limit is truncated.
+        """
+        with self._open_source(content) as stream:
+            pdf_reader = PyPDF2.PdfReader(stream)
+            chars = 0
+            for page_number, page in enumerate(pdf_reader.pages):
+                if self.max_pages is not None and page_number >= self.max_pages:
+                    return
+                page_text = page.extract_text() or ""
+                if self.max_chars is not None and chars + len(page_text) >= self.max_chars:
+                    yield page_text[:self.max_chars - chars]
+                    return
+                chars += len(page_text)
+                yield page_text
+
+    def _parse_pdf(self, stream: BinaryIO) -> str:
         """Extract text from PDF file"""
         try:
-            pdf_reader = PyPDF2.PdfReader(content)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text()
-            return text
+            # Join once at the end instead of growing a string page by page
+            return "\n".join(self.iter_pdf_pages(stream))
         except Exception as e:
             raise ValueError(f"Error parsing PDF: {str(e)}")
 
-    def _parse_doc(self, content: bytes) -> str:
+    def iter_docx_lines(self, content: ResumeSource) -> Iterator[str]:
+        """Yield the text of a DOCX file line by line without building a document model.
+
+        Headers come first, then the body and the footers. Each paragraph is a
+        line and each table row is a line with its cells separated by tabs.
+        Only the XML parts are read from the archive, so embedded images are
+        never decompressed. Stops once `max_chars` characters have been
+        produced; the line that crosses the limit is truncated.
+        """
+        with self._open_source(content, allow_mmap=False) as stream, zipfile.ZipFile(stream) as archive:
+            names = archive.namelist()
+            parts = sorted(name for name in names if _DOCX_HEADER.match(name))
+            parts.append('word/document.xml')
+            parts.extend(sorted(name for name in names if _DOCX_FOOTER.match(name)))
+            chars = 0
+            for part in parts:
+                with archive.open(part) as xml_stream:
+                    for line in self._iter_docx_part(xml_stream):
+                        if self.max_chars is not None and chars + len(line) >= self.max_chars:
+                            yield line[:self.max_chars - chars]
+                            return
+                        chars += len(line)
+                        yield line
+
+    @staticmethod
+    def _iter_docx_part(xml_stream: BinaryIO) -> Iterator[str]:
+        paragraphs = []  # run text of each open paragraph (text boxes nest them)
+        cells = []       # paragraphs of each open table cell
+        rows = []        # cells of each open table row
+        skipped = 0
+
+        for event, element in ElementTree.iterparse(xml_stream, events=('start', 'end')):
+            tag = element.tag
+            if tag in _DOCX_SKIPPED:
+                skipped += 1 if event == 'start' else -1
+            if skipped or (event == 'end' and tag in _DOCX_SKIPPED):
+                if event == 'end':
+                    element.clear()
+                continue
+
+            if event == 'start':
+                if tag == _W_P:
+                    paragraphs.append([])
+                elif tag == _W_TC:
+                    cells.append([])
+                elif tag == _W_TR:
+                    rows.append([])
+                continue
+
+            if tag == _W_T:
+                if paragraphs:
+                    paragraphs[-1].append(element.text or '')
+            elif tag == _W_TAB:
+                if paragraphs:
+                    paragraphs[-1].append('\t')
+            elif tag == _W_BR or tag == _W_CR:
+                if paragraphs:
+                    paragraphs[-1].append('\n')
+            elif tag == _W_P:
+                text = ''.join(paragraphs.pop())
+                if cells:
+                    cells[-1].append(text)
+                else:
+                    yield text
+            elif tag == _W_TC:
+                cell_text = ' '.join(text for text in cells.pop() if text)
+                if rows:
+                    rows[-1].append(cell_text)
+            elif tag == _W_TR:
+                row_text = '\t'.join(rows.pop())
+                # A table nested inside a cell becomes part of that cell
+                if cells:
+                    cells[-1].append(row_text)
+                else:
+                    yield row_text
+            # Finished elements are no longer needed; keep memory flat on large parts
+            element.clear()
+
+    def _parse_doc(self, stream: BinaryIO) -> str:
         """Extract text from DOC/DOCX file"""
         try:
-            doc = Document(content)
-            return "\n".join([paragraph.text for paragraph in doc.paragraphs])
+            return "\n".join(self.iter_docx_lines(stream))
         except Exception as e:
             raise ValueError(f"Error parsing DOC/DOCX: {str(e)}")
 
@@ -67,6 +220,4 @@ class ResumeParser:
 
     def _extract_skills(self, text: str) -> list:
         """Extract skills information"""
-        # Implement skills extraction logic
-        # This is a placeholder - implement actual extraction logic
-        return []
\ No newline at end of file
+        return self.skill_gazetteer.extract(text)
\ No newline at end of file
@@ -1,165 +1,236 @@
-from typing import Dict, Any, List, Tuple
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from typing import Dict, Any, List, NamedTuple, Optional
+from app.catalog import CatalogSnapshot, DEFAULT_CATALOG, EXPERIENCE_LEVELS, load_catalog
 from collections import defaultdict
 import numpy as np
-import json
-import os
+import threading
+
+class _Profile(NamedTuple):
+    """What recommendations need from one analyzed resume, with skills interned for a snapshot"""
+    # No dense vectors over the skill vocabulary: a batch holds one profile per
+    # resume, so those are built only while a resume is scored
+    skill_ids: np.ndarray
+    skill_bits: int
+    experience_level: str
+    weighted_skills: Dict[str, float]
+    industry_match: Optional[str]
 
 class Recommender:
-    def __init__(self):
-        # Initialize with sample job roles and courses
-        # In production, these would come from a database
-        self.skill_weights = {
-            "Python": 1.2, "Java": 1.1, "SQL": 1.1,
-            "Machine Learning": 1.3, "AWS": 1.2,
-            "Docker": 1.1, "Kubernetes": 1.2
-        }
+    """Job and course recommendations from a catalog snapshot.
+
+    Thread safety: get_recommendations may be called from any number of
+    threads at once, including while reload() runs. Scoring only reads the
+    current CatalogSnapshot, whose indexes are immutable and whose arrays
+    are read-only, and all per-request state lives in local variables. The
+    only shared mutable state is the snapshot reference, which is replaced
+    in a single assignment, and the term ID caches, which are thread-safe
+    LRU caches.
+    """
+
+    # Bump whenever recommendation output changes so cached results are not reused
+    format_version = "1"
+
+    def __init__(self, catalog_path: str = DEFAULT_CATALOG, index_dir: Optional[str] = None,
+                 ann_config: Optional[dict] = None, ann_min_entries: int = 200000,
+                 rebuild_indexes: bool = True):
+        # Job roles, courses, skill weights and industry clusters come from the
+        # catalog file and are compiled into an immutable snapshot
+        self.catalog_path = catalog_path
+        self.index_dir = index_dir
+        self.ann_config = ann_config
+        self.ann_min_entries = ann_min_entries
+        self.rebuild_indexes = rebuild_indexes
+        self._reload_lock = threading.Lock()
+        self._snapshot = self._build_snapshot()
+
+    def _build_snapshot(self) -> CatalogSnapshot:
+        return CatalogSnapshot(
+            load_catalog(self.catalog_path), self.index_dir, self.ann_config, self.ann_min_entries,
+            self.rebuild_indexes
+        )
+
+    @property
+    def snapshot(self) -> CatalogSnapshot:
+        return self._snapshot
+
+    @property
+    def catalog_version(self) -> str:
+        return self._snapshot.version
+
+    def reload(self) -> CatalogSnapshot:
+        """Build a snapshot from the current catalog file and swap it in.
+
+        Requests already running finish on the snapshot they started with;
+        if building fails the current snapshot stays in place.
+        """
+        with self._reload_lock:
+            snapshot = self._build_snapshot()
+            self._snapshot = snapshot
+        return snapshot
+
+    def get_recommendations(self, analyzed_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Generate personalized job and course recommendations"""
+        # Read the snapshot once so a concurrent reload can't mix two catalogs
+        snapshot = self._snapshot
+        profile = self._profile(snapshot, analyzed_data)
+
+        course_index = snapshot.course_index
+        course_similarities = course_index.similarities(course_index.query_vector(profile.weighted_skills))
         
-        self.industry_clusters = {
-            "web_development": ["Python", "Java", "SQL", "Git"],
-            "data_science": ["Python", "R", "Machine Learning", "Statistics"],
-            "cloud_devops": ["Docker", "Kubernetes", "AWS", "Linux"]
+        return {
+            'job_recommendations': self._recommend_jobs(snapshot, profile.weighted_skills, profile.industry_match),
+            'course_recommendations': self._recommend_courses(snapshot, course_similarities, profile),
+            'matched_industry': profile.industry_match
         }
-        
-        self.job_roles = [
-            {
-                "title": "Software Engineer",
-                "required_skills": ["Python", "Java", "SQL", "Git", "Agile"],
-                "description": "Develop and maintain software applications"
-            },
-            {
-                "title": "Data Scientist",
-                "required_skills": ["Python", "R", "Machine Learning", "SQL", "Statistics"],
-                "description": "Analyze complex data sets to drive business decisions"
-            },
-            {
-                "title": "DevOps Engineer",
-                "required_skills": ["Docker", "Kubernetes", "CI/CD", "AWS", "Linux"],
-                "description": "Implement and maintain deployment infrastructure"
-            }
-        ]
 
-        self.courses = [
-            {
-                "title": "Python Programming Masterclass",
-                "skills": ["Python", "Data Structures", "Algorithms"],
-                "level": "Intermediate"
-            },
-            {
-                "title": "Machine Learning Fundamentals",
-                "skills": ["Python", "Machine Learning", "Statistics"],
-                "level": "Advanced"
-            },
+    def get_recommendations_many(self, analyzed_list: List[Dict[str, Any]],
+                                 top_k: int = 3) -> List[Dict[str, Any]]:
+        """get_recommendations for many resumes at once, in the same order.
+
+        The query vectors of all resumes are stacked into one matrix per
+        catalog and scored with a sparse matrix product per block of rows,
+        and the best jobs of each row are selected in one vectorized pass.
+        Results match calling get_recommendations for each resume, up to
+        floating-point rounding in the scores.
+        """
+        snapshot = self._snapshot
+        profiles = [self._profile(snapshot, analyzed_data) for analyzed_data in analyzed_list]
+        weighted_skills_list = [profile.weighted_skills for profile in profiles]
+
+        job_index = snapshot.job_index
+        industry_bonuses = [snapshot.industry_job_bonus(profile.industry_match) for profile in profiles]
+        job_hits = job_index.top_k_many(job_index.query_matrix(weighted_skills_list), top_k, industry_bonuses)
+
+        course_index = snapshot.course_index
+        course_recommendations = []
+        for start, similarities in course_index.similarity_chunks(course_index.query_matrix(weighted_skills_list)):
+            for profile, row in zip(profiles[start:], similarities):
+                course_recommendations.append(self._recommend_courses(snapshot, row, profile))
+
+        return [
             {
-                "title": "Cloud Computing Essentials",
-                "skills": ["AWS", "Cloud Architecture", "DevOps"],
-                "level": "Beginner"
+                'job_recommendations': self._job_results(
+                    snapshot, job_ids, job_similarities, bonus, profile.industry_match
+                ),
+                'course_recommendations': courses,
+                'matched_industry': profile.industry_match
             }
+            for profile, (job_ids, job_similarities), bonus, courses
+            in zip(profiles, job_hits, industry_bonuses, course_recommendations)
         ]
 
-        self.vectorizer = TfidfVectorizer()
-
-    def get_recommendations(self, analyzed_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate personalized job and course recommendations"""
+    def _profile(self, snapshot: CatalogSnapshot, analyzed_data: Dict[str, Any]) -> _Profile:
+        """Skills, experience level, weighted skills and industry of one analyzed resume"""
         skills = analyzed_data.get('skills', [])
         experience_level = analyzed_data.get('experience_level', 'intermediate')
         industry_preference = analyzed_data.get('industry_preference', None)
-        
-        weighted_skills = self._apply_skill_weights(skills)
-        industry_match = self._get_industry_match(skills) if not industry_preference else industry_preference
-        
-        return {
-            'job_recommendations': self._recommend_jobs(weighted_skills, industry_match),
-            'course_recommendations': self._recommend_courses(weighted_skills, skills, experience_level),
-            'matched_industry': industry_match
-        }
 
-    def _apply_skill_weights(self, skills: List[str]) -> str:
+        # Skills outside the catalog vocabulary can't overlap with any job, course or cluster
+        skill_ids = snapshot.skills.ids(skills)
+        skill_bits = snapshot.skills.bitset(skill_ids)
+        weighted_skills = self._apply_skill_weights(snapshot, skills)
+        industry_match = self._get_industry_match(snapshot, skill_ids) if not industry_preference else industry_preference
+        return _Profile(skill_ids, skill_bits, experience_level, weighted_skills, industry_match)
+
+    @staticmethod
+    def _skill_vector(snapshot: CatalogSnapshot, skill_ids: np.ndarray) -> np.ndarray:
+        """0/1 vector over the snapshot's skill IDs"""
+        skill_vector = np.zeros(len(snapshot.skills))
+        skill_vector[skill_ids] = 1.0
+        return skill_vector
+
+    def _apply_skill_weights(self, snapshot: CatalogSnapshot, skills: List[str]) -> Dict[str, float]:
         """Apply weights to skills based on market demand"""
-        weighted_skills = []
+        weighted_skills = defaultdict(float)
         for skill in skills:
-            weight = self.skill_weights.get(skill, 1.0)
-            weighted_skills.extend([skill] * int(weight * 10))
-        return ' '.join(weighted_skills)
+            weighted_skills[skill] += snapshot.skill_weights.get(skill, 1.0)
+        return weighted_skills
     
-    def _get_industry_match(self, skills: List[str]) -> str:
+    def match_industries(self, skills: List[str], top_k: int = 5) -> List[Dict[str, Any]]:
+        """The `top_k` industry clusters best covered by `skills`, with the share of each cluster covered"""
+        snapshot = self._snapshot
+        coverage = snapshot.industry_coverage(self._skill_vector(snapshot, snapshot.skills.ids(skills)))
+        # Equal coverage keeps catalog order
+        order = np.lexsort((np.arange(len(coverage)), -coverage))[:top_k]
+        return [
+            {'industry': snapshot.industry_names[idx], 'coverage': float(coverage[idx])}
+            for idx in order
+        ]
+
+    def _get_industry_match(self, snapshot: CatalogSnapshot, skill_ids: np.ndarray) -> Optional[str]:
         """Determine the best matching industry based on skills"""
-        industry_scores = defaultdict(float)
-        for industry, cluster_skills in self.industry_clusters.items():
-            common_skills = set(skills) & set(cluster_skills)
-            industry_scores[industry] = len(common_skills) / len(cluster_skills)
-        return max(industry_scores.items(), key=lambda x: x[1])[0] if industry_scores else None
+        # Coverage of every cluster from one sparse product; argmax keeps the first of equal scores
+        coverage = snapshot.industry_coverage(self._skill_vector(snapshot, skill_ids))
+        return snapshot.industry_names[int(np.argmax(coverage))] if len(coverage) else None
 
-    def _recommend_jobs(self, weighted_skills: str, industry_match: str) -> list:
+    def _recommend_jobs(self, snapshot: CatalogSnapshot, weighted_skills: Dict[str, float],
+                        industry_match: str, top_k: int = 3) -> list:
         """Recommend job roles based on weighted skills and industry match"""
-        job_texts = [' '.join(job['required_skills']) for job in self.job_roles]
-        job_texts.append(weighted_skills)
+        # Score only jobs sharing skills with the resume, via the job index's posting lists
+        query = snapshot.job_index.query_vector(weighted_skills)
+        industry_bonus = snapshot.industry_job_bonus(industry_match)
+        job_ids, similarities = snapshot.job_index.top_k(query, top_k, industry_bonus)
+        return self._job_results(snapshot, job_ids, similarities, industry_bonus, industry_match)
 
-        # Calculate similarity with TF-IDF and industry bonus
-        tfidf_matrix = self.vectorizer.fit_transform(job_texts)
-        base_similarities = cosine_similarity(tfidf_matrix[-1:], tfidf_matrix[:-1])[0]
-        
+    def _job_results(self, snapshot: CatalogSnapshot, job_ids, similarities,
+                     industry_bonus, industry_match: str) -> list:
         # Apply industry matching bonus
+        bonuses = industry_bonus.of(job_ids) if industry_bonus is not None else np.zeros(len(job_ids))
         job_recommendations = []
-        for idx, similarity in enumerate(base_similarities):
-            if similarity > 0:
-                job = self.job_roles[idx]
-                industry_bonus = 0.2 if any(skill in self.industry_clusters.get(industry_match, []) 
-                                          for skill in job['required_skills']) else 0
-                final_score = min(similarity + industry_bonus, 1.0)
-                
-                job_recommendations.append({
-                    **job,
-                    'match_score': float(final_score),
-                    'industry_alignment': industry_match if industry_bonus > 0 else None
-                })
-        
-        # Sort by match score and return top 3
-        job_recommendations.sort(key=lambda x: x['match_score'], reverse=True)
-        return job_recommendations[:3]
+        for idx, similarity, bonus in zip(job_ids, similarities, bonuses):
+            job = snapshot.job_roles[idx]
+            final_score = min(similarity + bonus, 1.0)
 
-    def _recommend_courses(self, weighted_skills: str, user_skills: list, experience_level: str) -> list:
-        """Recommend courses based on skills gap analysis and experience level"""
-        course_texts = [' '.join(course['skills']) for course in self.courses]
-        course_texts.append(weighted_skills)
+            job_recommendations.append({
+                **job,
+                'match_score': float(final_score),
+                'industry_alignment': industry_match if bonus > 0 else None
+            })
 
-        # Calculate similarity between skills and course content
-        tfidf_matrix = self.vectorizer.fit_transform(course_texts)
-        cosine_similarities = cosine_similarity(tfidf_matrix[-1:], tfidf_matrix[:-1])[0]
+        # Already ordered by match score
+        return job_recommendations
+
+    def _recommend_courses(self, snapshot: CatalogSnapshot, cosine_similarities: np.ndarray,
+                           profile: _Profile, top_k: int = 3) -> list:
+        """Recommend courses based on skills gap analysis and experience level.
+
+        `cosine_similarities` holds the similarity between the skills and every course.
+        """
+        experience_level = profile.experience_level
+        # Which catalog skills the user already has, as a 0/1 vector over skill IDs
+        has_skill = self._skill_vector(snapshot, profile.skill_ids)
+
+        # Adjust similarity based on experience level match
+        user_level = EXPERIENCE_LEVELS.get(experience_level.lower(), 1)
+        relevance = cosine_similarities * snapshot.course_level_factors[user_level]
+
+        # Count and total market weight of the skills each course would add
+        missing_counts = snapshot.course_skill_counts - snapshot.course_skills @ has_skill
+        missing_weights = (snapshot.course_weight_totals
+                           - snapshot.course_skills @ (snapshot.skill_weight_vector * has_skill))
+
+        # Recommend only courses with skills to learn, ranked by a combination of
+        # relevance and average importance of the missing skills
+        course_ids = np.nonzero(missing_counts > 0.5)[0]
+        importance = missing_weights[course_ids] / missing_counts[course_ids]
+        scores = relevance[course_ids] * 0.7 + importance * 0.3
+        if len(course_ids) > top_k:
+            kth = np.partition(scores, len(scores) - top_k)[len(scores) - top_k]
+            keep = scores >= kth
+            course_ids, importance, scores = course_ids[keep], importance[keep], scores[keep]
+        # Equal scores keep catalog order
+        order = np.lexsort((course_ids, -scores))[:top_k]
 
-        # Get course recommendations based on skill gaps and experience level
         course_recommendations = []
-        experience_levels = {'beginner': 0, 'intermediate': 1, 'advanced': 2}
-        user_level = experience_levels.get(experience_level.lower(), 1)
-
-        for idx, similarity in enumerate(cosine_similarities):
-            course = self.courses[idx]
-            course_level = experience_levels.get(course['level'].lower(), 1)
-            level_diff = abs(course_level - user_level)
-            
-            # Adjust similarity based on experience level match
-            adjusted_similarity = similarity * (1 - 0.2 * level_diff)
-            
-            missing_skills = [skill for skill in course['skills'] 
-                            if skill not in user_skills]
-            
-            if missing_skills:  # Recommend if there are skills to learn
-                # Calculate skill importance score
-                skill_importance = sum(self.skill_weights.get(skill, 1.0) 
-                                     for skill in missing_skills) / len(missing_skills)
-                
-                course_recommendations.append({
-                    **course,
-                    'missing_skills': missing_skills,
-                    'relevance_score': float(adjusted_similarity),
-                    'skill_importance': float(skill_importance),
-                    'experience_match': course['level'] == experience_level
-                })
-
-        # Sort by a combination of relevance and skill importance
-        course_recommendations.sort(
-            key=lambda x: (x['relevance_score'] * 0.7 + x['skill_importance'] * 0.3),
-            reverse=True
-        )
-        return course_recommendations[:3]
\ No newline at end of file
+        for idx, skill_importance in zip(course_ids[order], importance[order]):
+            course = snapshot.courses[idx]
+            course_recommendations.append({
+                **course,
+                'missing_skills': [
+                    skill for skill, skill_id in zip(course['skills'], snapshot.course_skill_ids[idx])
+                    if not profile.skill_bits >> skill_id & 1
+                ],
+                'relevance_score': float(relevance[idx]),
+                'skill_importance': float(skill_importance),
+                'experience_match': course['level'] == experience_level
+            })
+        return course_recommendations
@@ -0,0 +1,168 @@
+"""Production launcher: load everything once, then fork workers that share it.
+
+Usage:
+    python -m app.serve [--workers N] [--host HOST] [--port PORT]
+
+The parent process binds the listening socket and imports the application,
+which loads the spaCy model, the skill gazetteer and the catalog indexes.
+It then forks the workers, which serve the same socket with uvicorn. The
+loaded structures are only read after startup, so their memory pages stay
+shared copy-on-write between all workers instead of being loaded again per
+worker. Per-process RSS and PSS (RSS with shared pages split between the
+processes sharing them) are logged once the workers are up.
+
+Workers that die are replaced, after a delay that grows while they keep
+dying soon after starting (SERVE_RESTART_DELAY, SERVE_RESTART_MAX_DELAY).
+
+Requires fork(), i.e. Linux or macOS; elsewhere run
+`uvicorn app.main:app --host 0.0.0.0 --port 8000` from the directory that
+contains the app package.
+"""
+from typing import Dict, Optional
+from app import config
+import argparse
+import logging
+import signal
+import socket
+import time
+import gc
+import os
+import uvicorn
+
+logger = logging.getLogger("app.serve")
+
+def memory_usage(pid: int) -> Dict[str, int]:
+    """RSS, PSS, shared and private memory of a process in kB, from /proc/<pid>/smaps_rollup"""
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1])
+    except OSError:
+        # Not Linux, or the process is gone
+        return {}
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "shared": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+        "private": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    }
+
+def _log_memory(name: str, pid: int):
+    usage = memory_usage(pid)
+    if usage:
+        logger.info(
+            "%s (pid %d): RSS %.1f MB, PSS %.1f MB, shared %.1f MB, private %.1f MB",
+            name, pid, *(usage[field] / 1024 for field in ("rss", "pss", "shared", "private"))
+        )
+
+def _bind(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+def _serve_worker(app, sock: socket.socket, host: str, port: int):
+    # Start from default signal handling; uvicorn installs its own for graceful shutdown
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port))
+    server.run(sockets=[sock])
+
+def _fork_worker(app, sock: socket.socket, host: str, port: int) -> int:
+    pid = os.fork()
+    if pid == 0:
+        status = 0
+        try:
+            _serve_worker(app, sock, host, port)
+        except BaseException:
+            logger.exception("Worker %d failed", os.getpid())
+            status = 1
+        finally:
+            # Never fall back into the parent's supervision loop
+            os._exit(status)
+    return pid
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=config.SERVE_WORKERS)
+    parser.add_argument("--host", default=config.SERVE_HOST)
+    parser.add_argument("--port", type=int, default=config.SERVE_PORT)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+
+    sock = _bind(args.host, args.port)
+
+    started = time.perf_counter()
+    from app.main import app
+    logger.info("Preloaded application in %.2fs", time.perf_counter() - started)
+
+    # Everything allocated so far lives as long as the process. Freezing it
+    # moves it out of the collector's generations, so collections in the
+    # workers don't write to those objects and un-share their pages.
+    gc.collect()
+    gc.freeze()
+    _log_memory("parent", os.getpid())
+
+    workers = {_fork_worker(app, sock, args.host, args.port) for _ in range(args.workers)}
+    started_at = {pid: time.monotonic() for pid in workers}
+    # When replacement workers are due to be forked
+    restarts = []
+    restart_delay = config.SERVE_RESTART_DELAY
+    logger.info("Serving on %s:%d with %d workers", args.host, args.port, args.workers)
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    report_at = time.monotonic() + config.SERVE_MEMORY_REPORT_DELAY
+    while workers or restarts:
+        if stopping:
+            restarts.clear()
+        for due in [at for at in restarts if at <= time.monotonic()]:
+            restarts.remove(due)
+            pid = _fork_worker(app, sock, args.host, args.port)
+            workers.add(pid)
+            started_at[pid] = time.monotonic()
+
+        pid, status = os.waitpid(-1, os.WNOHANG) if workers else (0, 0)
+        if pid == 0:
+            if report_at is not None and time.monotonic() >= report_at:
+                report_at = None
+                _log_memory("parent", os.getpid())
+                for worker in sorted(workers):
+                    _log_memory("worker", worker)
+            time.sleep(0.5)
+            continue
+        workers.discard(pid)
+        lifetime = time.monotonic() - started_at.pop(pid)
+        if not stopping:
+            # Replace workers that died; the new one forks from the preloaded parent again.
+            # One that had been running for a while starts the backoff over.
+            if lifetime >= config.SERVE_RESTART_MAX_DELAY:
+                restart_delay = config.SERVE_RESTART_DELAY
+            logger.warning(
+                "Worker %d exited with wait status %d, restarting it in %.1fs", pid, status, restart_delay
+            )
+            restarts.append(time.monotonic() + restart_delay)
+            restart_delay = min(restart_delay * 2, config.SERVE_RESTART_MAX_DELAY)
+
+    sock.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+from typing import Any, Awaitable, Callable, Dict
+import asyncio
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into a single computation.
+
+    The first caller for a key starts the computation as a task; callers that
+    arrive with the same key while it runs wait for that task instead of
+    starting their own, and all of them get its result or its exception. The
+    key is forgotten as soon as the task finishes, so later calls start fresh
+    (repeats after that are the result cache's job).
+
+    Waiting goes through `asyncio.shield`: a caller that disconnects stops
+    waiting, but the shared task keeps running for the others.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+        self.counters = {
+            "leaders": 0,
+            "coalesced": 0
+        }
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Await the running computation for `key`, or start one with `func()` if there is none"""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            self.counters["leaders"] += 1
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.counters["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Every waiter may have gone away; retrieve the exception so it isn't logged as unhandled
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.counters, "in_flight": len(self._calls)}
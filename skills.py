@@ -0,0 +1,251 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from collections import deque
+from app.artifacts import MissingArtifact
+import hashlib
+import numpy as np
+import pickle
+import json
+import os
+import re
+
+DEFAULT_TAXONOMY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'skills.json')
+
+_WHITESPACE = re.compile(r'\s+')
+# Very short names such as "R", "C" or "Go" only count when written with the
+# same capitalisation as in the taxonomy; case-insensitively they match everywhere
+_CASE_SENSITIVE_MAX_LENGTH = 2
+# Transition keys pack (state, character) into one int so the whole automaton is a
+# single flat dict rather than one dict per trie node
+_CHAR_BITS = 21
+
+def _normalize(text: str) -> str:
+    return _WHITESPACE.sub(' ', text).strip()
+
+class SkillGazetteer:
+    """Finds every known skill and alias in a text in one linear pass.
+
+    The taxonomy maps canonical skill names to lists of aliases. All of them
+    are compiled into an Aho-Corasick automaton, and matches are reported as
+    canonical names. Compiling a large taxonomy takes a while, so `load` saves
+    the compiled gazetteer next to the other indexes and reuses it while the
+    taxonomy file is unchanged.
+    """
+
+    def __init__(self, taxonomy: Dict[str, List[str]], fingerprint: Optional[str] = None):
+        self.fingerprint = fingerprint
+        self.canonical_names: List[str] = []
+        # Per pattern: canonical skill index, pattern length, exact text when case-sensitive
+        self._patterns: List[Tuple[int, int, Optional[str]]] = []
+        self._aliases: Dict[str, int] = {}
+        self._exact_aliases: Dict[str, int] = {}
+        pattern_keys: List[str] = []
+
+        for canonical, aliases in taxonomy.items():
+            skill_id = len(self.canonical_names)
+            self.canonical_names.append(canonical)
+            for name in [canonical, *aliases]:
+                name = _normalize(name)
+                if not name:
+                    continue
+                if len(name) <= _CASE_SENSITIVE_MAX_LENGTH:
+                    aliases_table, exact = self._exact_aliases, name
+                else:
+                    aliases_table, exact = self._aliases, None
+                key = name.lower()
+                if (exact or key) in aliases_table:
+                    continue
+                aliases_table[exact or key] = skill_id
+                self._patterns.append((skill_id, len(key), exact))
+                pattern_keys.append(key)
+
+        self._compile(pattern_keys)
+
+    def _compile(self, pattern_keys: List[str]):
+        goto: Dict[int, int] = {}
+        outputs: List[List[int]] = [[]]
+        children: List[List[Tuple[int, int]]] = [[]]
+
+        # Build the trie of lower-cased patterns
+        for pattern_id, key in enumerate(pattern_keys):
+            state = 0
+            for char in key:
+                code = ord(char)
+                edge = (state << _CHAR_BITS) | code
+                next_state = goto.get(edge)
+                if next_state is None:
+                    next_state = len(outputs)
+                    goto[edge] = next_state
+                    outputs.append([])
+                    children.append([])
+                    children[state].append((code, next_state))
+                state = next_state
+            outputs[state].append(pattern_id)
+
+        # Breadth-first pass for failure links; outputs are merged along them so
+        # the scanner never has to walk failure chains to report matches
+        fail = [0] * len(outputs)
+        queue = deque(child for _, child in children[0])
+        while queue:
+            state = queue.popleft()
+            for code, child in children[state]:
+                queue.append(child)
+                fallback = fail[state]
+                while fallback and ((fallback << _CHAR_BITS) | code) not in goto:
+                    fallback = fail[fallback]
+                target = goto.get((fallback << _CHAR_BITS) | code, 0)
+                fail[child] = target if target != child else 0
+                outputs[child] = outputs[child] + outputs[fail[child]]
+
+        self._goto = goto
+        self._fail = fail
+        self._outputs = [tuple(pattern_ids) for pattern_ids in outputs]
+
+    @classmethod
+    def from_file(cls, taxonomy_path: str) -> 'SkillGazetteer':
+        with open(taxonomy_path, 'rb') as f:
+            raw = f.read()
+        return cls(json.loads(raw), hashlib.sha256(raw).hexdigest())
+
+    @classmethod
+    def load(cls, taxonomy_path: str = DEFAULT_TAXONOMY, cache_path: Optional[str] = None,
+             rebuild: bool = True) -> 'SkillGazetteer':
+        """Load the compiled gazetteer from `cache_path`, recompiling it if the taxonomy changed.
+
+        With `rebuild=False` (prebuilt, possibly read-only artifacts) a missing or
+        outdated `cache_path` raises MissingArtifact instead of being recompiled.
+        """
+        if cache_path is None:
+            return cls.from_file(taxonomy_path)
+
+        with open(taxonomy_path, 'rb') as f:
+            fingerprint = hashlib.sha256(f.read()).hexdigest()
+        if os.path.exists(cache_path):
+            with open(cache_path, 'rb') as f:
+                gazetteer = pickle.load(f)
+            if gazetteer.fingerprint == fingerprint:
+                return gazetteer
+        if not rebuild:
+            raise MissingArtifact(
+                f"Skill gazetteer {cache_path} is missing or was compiled from another taxonomy "
+                f"than {taxonomy_path}; rebuild the artifacts with `python -m app.artifacts`"
+            )
+
+        gazetteer = cls.from_file(taxonomy_path)
+        directory = os.path.dirname(cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(gazetteer, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+        return gazetteer
+
+    def __len__(self) -> int:
+        return len(self.canonical_names)
+
+    def canonical(self, name: str) -> Optional[str]:
+        """Canonical skill name for an exact skill name or alias, if it is known"""
+        name = _normalize(name)
+        if len(name) <= _CASE_SENSITIVE_MAX_LENGTH:
+            skill_id = self._exact_aliases.get(name)
+        else:
+            skill_id = self._aliases.get(name.lower())
+        return self.canonical_names[skill_id] if skill_id is not None else None
+
+    def find(self, text: str) -> List[Tuple[int, int, str]]:
+        """Return (start, end, canonical name) for the leftmost-longest non-overlapping matches.
+
+        Offsets refer to the text with whitespace runs collapsed to single spaces.
+        """
+        text = _normalize(text)
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # A few characters lower-case to more than one character; leave those
+            # alone so offsets stay aligned with the original text
+            lowered = ''.join(char if len(char.lower()) != 1 else char.lower() for char in text)
+
+        goto, fail, outputs, patterns = self._goto, self._fail, self._outputs, self._patterns
+        candidates = []
+        state = 0
+        for position, char in enumerate(lowered):
+            code = ord(char)
+            while True:
+                next_state = goto.get((state << _CHAR_BITS) | code)
+                if next_state is not None:
+                    state = next_state
+                    break
+                if state == 0:
+                    break
+                state = fail[state]
+
+            for pattern_id in outputs[state]:
+                skill_id, length, exact = patterns[pattern_id]
+                end = position + 1
+                start = end - length
+                if exact is not None and text[start:end] != exact:
+                    continue
+                # Only whole words count, unless the pattern itself starts or
+                # ends with punctuation as in "C++" or ".NET"
+                if start > 0 and lowered[start].isalnum() and lowered[start - 1].isalnum():
+                    continue
+                if end < len(lowered) and lowered[end - 1].isalnum() and lowered[end].isalnum():
+                    continue
+                candidates.append((start, end, skill_id))
+
+        candidates.sort(key=lambda match: (match[0], match[0] - match[1]))
+        matches = []
+        covered_until = 0
+        for start, end, skill_id in candidates:
+            if start >= covered_until:
+                matches.append((start, end, self.canonical_names[skill_id]))
+                covered_until = end
+        return matches
+
+    def extract(self, text: str) -> List[str]:
+        """Canonical names of the skills mentioned in `text`, in order of first mention"""
+        return list(dict.fromkeys(name for _, _, name in self.find(text)))
+
+class SkillVocabulary:
+    """Interns skill names to dense integer IDs, so skill sets become ID arrays and bitsets.
+
+    Bit i of a bitset is set when the skill with ID i is in the set, so
+    overlap is `a & b` and gaps are `a & ~b`. Names are matched exactly;
+    the same skill must be spelled the same way everywhere it is interned.
+    A vocabulary is filled while its catalog snapshot is built and only read
+    afterwards.
+    """
+
+    def __init__(self, names: Iterable[str] = ()):
+        self.names: List[str] = []
+        self._ids: Dict[str, int] = {}
+        for name in names:
+            self.intern(name)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._ids
+
+    def intern(self, name: str) -> int:
+        """ID of `name`, assigning the next free one if it is new"""
+        skill_id = self._ids.get(name)
+        if skill_id is None:
+            skill_id = self._ids[name] = len(self.names)
+            self.names.append(name)
+        return skill_id
+
+    def get(self, name: str) -> Optional[int]:
+        return self._ids.get(name)
+
+    def ids(self, names: Iterable[str]) -> np.ndarray:
+        """Sorted, unique IDs of the known skills among `names`; unknown names are ignored"""
+        ids = {self._ids[name] for name in names if name in self._ids}
+        return np.array(sorted(ids), dtype=np.int64)
+
+    @staticmethod
+    def bitset(ids: Iterable[int]) -> int:
+        bits = 0
+        for skill_id in ids:
+            bits |= 1 << int(skill_id)
+        return bits
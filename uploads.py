@@ -0,0 +1,115 @@
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Dict, List, Union
+import tempfile
+import hashlib
+import os
+
+class UploadTooLarge(ValueError):
+    """Raised when an upload exceeds the configured size limit"""
+
+class RequestSizeLimit:
+    """ASGI middleware that caps the request body size of the upload endpoints.
+
+    The multipart parser spools every file to its own temp file before an
+    endpoint runs, so limits checked by the endpoint come too late to bound
+    what is received. This runs first: a declared Content-Length over the
+    limit of its path is refused with 413 before anything is read, and a
+    body sent without one is cut off with 413 once it passes the limit.
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            return await self.app(scope, receive, send)
+
+        detail = f"Request body is larger than {limit} bytes"
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            return await JSONResponse({"detail": detail}, status_code=413)(scope, receive, send)
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Raised while the form is parsed, so the endpoint answers 413
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+class SpooledUpload:
+    """An upload read in chunks, kept in memory when small and in a temp file otherwise.
+
+    `source` is either the bytes or the path of the temp file, which makes it
+    cheap to hand to a worker process. The SHA-256 of the content is computed
+    while reading, so cache lookups don't need a second pass over the data.
+    """
+
+    def __init__(self, source: Union[bytes, str], digest: str, size: int):
+        self.source = source
+        self.digest = digest
+        self.size = size
+
+    @property
+    def on_disk(self) -> bool:
+        return isinstance(self.source, str)
+
+    @classmethod
+    async def read(cls, file: UploadFile, max_size: int, spool_threshold: int,
+                   chunk_size: int = 1024 * 1024) -> 'SpooledUpload':
+        """Copy an uploaded file out of the request, raising UploadTooLarge past `max_size`.
+
+        By now the whole request has been received, so `max_size` only bounds
+        what one file may hand to the parser and the cache; RequestSizeLimit
+        is what bounds the bytes received.
+        """
+        hasher = hashlib.sha256()
+        chunks: List[bytes] = []
+        spool = None
+        size = 0
+        try:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                # Enforce the limit while reading rather than after buffering everything
+                if size > max_size:
+                    raise UploadTooLarge(f"{file.filename} is larger than {max_size} bytes")
+                hasher.update(chunk)
+
+                if spool is None and size > spool_threshold:
+                    spool = tempfile.NamedTemporaryFile(prefix="resume-", delete=False)
+                    await run_in_threadpool(spool.writelines, chunks)
+                    chunks = []
+                if spool is not None:
+                    await run_in_threadpool(spool.write, chunk)
+                else:
+                    chunks.append(chunk)
+        except BaseException:
+            if spool is not None:
+                spool.close()
+                os.unlink(spool.name)
+            raise
+
+        if spool is not None:
+            spool.close()
+            return cls(spool.name, hasher.hexdigest(), size)
+        return cls(b"".join(chunks), hasher.hexdigest(), size)
+
+    def cleanup(self):
+        if self.on_disk:
+            try:
+                os.unlink(self.source)
+            except FileNotFoundError:
+                pass